@@ -1,10 +1,44 @@
 # core/__init__.py
-from .algorithms import dijkstra, prim_mst
-from .data_storage import deserialize_graph, serialize_graph
-from .graph import Graph
+from .algorithms import (
+    ShortestPathMatrix,
+    SpanningTree,
+    all_pairs_shortest_paths,
+    dijkstra,
+    minimum_spanning_tree,
+    prim_mst,
+    shortest_path,
+)
+from .binary_storage import (
+    BINARY_EXTENSION,
+    BinaryGraph,
+    StringTable,
+    load_graph_binary,
+    save_graph_binary,
+)
+from .csr import CSRGraph, csr_snapshot
+from .data_storage import (
+    deserialize_graph,
+    iter_graph_batches,
+    load_graph_stream,
+    serialize_graph,
+)
+from .dynamic_mst import DynamicMST
+from .graph import (
+    CLEARED,
+    EDGES_ADDED,
+    EDGES_REMOVED,
+    NODES_ADDED,
+    NODES_MOVED,
+    NODES_REMOVED,
+    Graph,
+    GraphChange,
+)
 from .layout import (
     force_directed_layout,
+    iter_force_directed_layout,
+    iter_spring_layout,
     kamada_kawai_layout,
     random_layout,
     spring_layout,
+    spring_positions,
 )
@@ -1,13 +1,57 @@
 # core/algorithms.py
+import heapq
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import networkx as nx
+import numpy as np
+from .csr import CSRGraph, csr_snapshot
+
+SHORTEST_PATH_CACHE_SIZE = 32
+
+# Граф -> (версия графа, OrderedDict источник -> (длины, пути)).
+_shortest_path_cache = weakref.WeakKeyDictionary()
+
+# Граф -> ((version, positions_version), позиции узлов, множитель эвристики A*).
+_heuristic_cache = weakref.WeakKeyDictionary()
+
+
+def _shortest_path_tree(graph, start: str) -> tuple[dict, dict]:
+    """
+    Возвращает дерево кратчайших путей из start, по возможности из кэша.
+
+    Кэш хранит до SHORTEST_PATH_CACHE_SIZE последних источников для каждого
+    графа и сбрасывается, когда меняется graph.version (его увеличивают все
+    операции, изменяющие узлы и рёбра; перемещение узлов его не меняет).
+    Графы без атрибута version не кэшируются.
+    """
+    version = getattr(graph, "version", None)
+    if version is None:
+        return nx.single_source_dijkstra(graph.graph, source=start)
+
+    cached_version, trees = _shortest_path_cache.get(graph, (None, None))
+    if cached_version != version:
+        trees = OrderedDict()
+        _shortest_path_cache[graph] = (version, trees)
+
+    if start in trees:
+        trees.move_to_end(start)
+        return trees[start]
+
+    tree = nx.single_source_dijkstra(graph.graph, source=start)
+    trees[start] = tree
+    if len(trees) > SHORTEST_PATH_CACHE_SIZE:
+        trees.popitem(last=False)
+    return tree
 
 
 def dijkstra(graph: nx.Graph, start: str, end: str = None) -> tuple:
     """
     Реализует алгоритм Дейкстры для нахождения кратчайших путей.
+    Повторные запросы из того же узла к неизменённому графу берутся из кэша.
     """
     try:
-        lengths, paths = nx.single_source_dijkstra(graph.graph, source=start)
+        lengths, paths = _shortest_path_tree(graph, start)
         if end is not None:
             if end in paths:
                 path = paths[end]
@@ -20,17 +64,323 @@ def dijkstra(graph: nx.Graph, start: str, end: str = None) -> tuple:
             for target, path in paths.items():
                 edges = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
                 edges_dict[target] = edges
-            return lengths, edges_dict
+            return dict(lengths), edges_dict
     except nx.NetworkXError as e:
         raise ValueError(f"Ошибка алгоритма Дейкстры: {e}")
 
 
-def prim_mst(graph: nx.Graph) -> list:
+def _heuristic_data(graph) -> tuple[dict, float]:
     """
-    Реализует алгоритм Прима для нахождения минимального остовного дерева.
+    Позиции узлов и наименьшее отношение веса ребра к его евклидовой длине.
+
+    Результат кэшируется для графов с атрибутами version и positions_version
+    (core.Graph) и пересчитывается, когда меняется состав графа или
+    позиции узлов. Остальные графы не кэшируются.
+    """
+    key = (getattr(graph, "version", None), getattr(graph, "positions_version", None))
+    cacheable = None not in key
+    if cacheable:
+        cached_key, positions, scale = _heuristic_cache.get(graph, (None, None, None))
+        if cached_key == key:
+            return positions, scale
+
+    positions = nx.get_node_attributes(graph.graph, "position")
+    scale = float("inf")
+    for u, v, weight in graph.graph.edges(data="weight", default=1):
+        if u in positions and v in positions:
+            (x1, y1), (x2, y2) = positions[u], positions[v]
+            length = ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
+            if length > 0:
+                scale = min(scale, weight / length)
+    if scale == float("inf"):
+        scale = 0.0
+
+    if cacheable:
+        _heuristic_cache[graph] = (key, positions, scale)
+    return positions, scale
+
+
+def _euclidean_heuristic(graph, end: str, scale: float = None):
     """
+    Эвристика A*: евклидово расстояние между атрибутами position, умноженное на scale.
+
+    Если scale не задан, берётся наименьшее отношение веса ребра к его
+    евклидовой длине — с таким множителем эвристика не переоценивает
+    остаток пути и A* находит кратчайший путь. Узлы без позиции дают 0.
+    Позиции и множитель берутся из _heuristic_data.
+    """
+    positions, min_scale = _heuristic_data(graph)
+    if end not in positions:
+        return lambda u, v: 0.0
+
+    if scale is None:
+        scale = min_scale
+
+    target_x, target_y = positions[end]
+
+    def heuristic(u, v):
+        if u not in positions:
+            return 0.0
+        x, y = positions[u]
+        return scale * ((x - target_x) ** 2 + (y - target_y) ** 2) ** 0.5
+
+    return heuristic
+
+
+def shortest_path(graph, start: str, end: str, method: str = "bidirectional",
+                  heuristic_scale: float = None) -> tuple:
+    """
+    Кратчайший путь между двумя узлами с остановкой, как только конечный узел найден.
+
+    method: "dijkstra" — однонаправленный поиск до конечного узла,
+    "bidirectional" — двунаправленный, "astar" — A* с евклидовой
+    эвристикой по атрибутам position (см. _euclidean_heuristic).
+    Уже вычисленное дерево из кэша dijkstra используется без пересчёта.
+    Возвращает длину пути и список рёбер, как dijkstra с end.
+    """
+    if method not in ("dijkstra", "bidirectional", "astar"):
+        raise ValueError(f"Неизвестный метод поиска пути: {method}.")
+
+    version = getattr(graph, "version", None)
+    cached_version, trees = _shortest_path_cache.get(graph, (None, None)) if version is not None else (None, None)
     try:
-        mst = nx.minimum_spanning_tree(graph.graph)
-        return list(mst.edges(data=True))
-    except nx.NetworkXError as e:
-        raise ValueError(f"Ошибка алгоритма Прима: {e}")
+        if cached_version == version and trees and start in trees:
+            lengths, paths = trees[start]
+            if end not in paths:
+                raise nx.NetworkXNoPath
+            length, path = lengths[end], paths[end]
+        elif method == "dijkstra":
+            length, path = nx.single_source_dijkstra(graph.graph, source=start, target=end)
+        elif method == "bidirectional":
+            length, path = nx.bidirectional_dijkstra(graph.graph, start, end)
+        else:
+            heuristic = _euclidean_heuristic(graph, end, heuristic_scale)
+            path = nx.astar_path(graph.graph, start, end, heuristic=heuristic)
+            length = nx.path_weight(graph.graph, path, weight="weight")
+    except nx.NetworkXNoPath:
+        raise ValueError(f"Нет пути до узла {end}.")
+    except (nx.NetworkXError, nx.NodeNotFound) as e:
+        raise ValueError(f"Ошибка поиска кратчайшего пути: {e}")
+
+    edges = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+    return length, edges
+
+
+class ShortestPathMatrix:
+    """
+    Результат поиска кратчайших путей между всеми парами узлов.
+
+    dist — матрица расстояний float32 (inf для недостижимых пар),
+    pred — матрица предшественников int32: pred[i, j] — индекс узла перед j
+    на кратчайшем пути из i (-1, если пути нет или i == j). Пути
+    восстанавливаются по запросу, а не хранятся целиком.
+    """
+
+    def __init__(self, nodes: list, dist: np.ndarray, pred: np.ndarray) -> None:
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes)}
+        self.dist = dist
+        self.pred = pred
+
+    def distance(self, start, end) -> float:
+        """
+        Длина кратчайшего пути между двумя узлами.
+        """
+        return float(self.dist[self.index[start], self.index[end]])
+
+    def path(self, start, end) -> list:
+        """
+        Восстанавливает кратчайший путь как список узлов.
+        """
+        i, j = self.index[start], self.index[end]
+        if i != j and self.pred[i, j] < 0:
+            raise ValueError(f"Нет пути до узла {end}.")
+        path = [j]
+        while j != i:
+            j = int(self.pred[i, j])
+            path.append(j)
+        return [self.nodes[k] for k in reversed(path)]
+
+    def edges(self, start, end) -> list:
+        """
+        Кратчайший путь как список рёбер, в том же виде, что возвращает dijkstra.
+        """
+        path = self.path(start, end)
+        return [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+
+
+def _check_weights(csr: CSRGraph) -> None:
+    """
+    Отклоняет графы с отрицательными весами рёбер.
+    """
+    negative = np.flatnonzero(csr.edge_weights < 0)
+    if len(negative):
+        k = negative[0]
+        u, v = csr.nodes[csr.edge_sources[k]], csr.nodes[csr.edge_targets[k]]
+        raise ValueError(f"Отрицательный вес ребра {u} - {v}.")
+
+
+def _floyd_warshall(csr: CSRGraph) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Алгоритм Флойда–Уоршелла: по одной векторной операции над матрицей N × N на каждый промежуточный узел.
+    """
+    n = csr.num_nodes
+    rows = np.repeat(np.arange(n), csr.degrees())
+    dist = np.full((n, n), np.inf)
+    np.minimum.at(dist, (rows, csr.indices), csr.weights)
+    pred = np.where(np.isfinite(dist), np.arange(n, dtype=np.int32)[:, None], -1).astype(np.int32)
+    np.fill_diagonal(dist, 0)
+    np.fill_diagonal(pred, -1)
+
+    for k in range(n):
+        through_k = dist[:, k, None] + dist[None, k, :]
+        shorter = through_k < dist
+        np.copyto(dist, through_k, where=shorter)
+        np.copyto(pred, np.broadcast_to(pred[k], (n, n)), where=shorter)
+
+    return dist.astype(np.float32), pred
+
+
+def _dijkstra_rows(indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray,
+                   sources: range) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Строки матриц расстояний и предшественников для заданных источников.
+    Соседи узла u читаются из CSR-массивов срезом indptr[u]:indptr[u + 1].
+    """
+    n = len(indptr) - 1
+    dist = np.full((len(sources), n), np.inf, dtype=np.float32)
+    pred = np.full((len(sources), n), -1, dtype=np.int32)
+    indptr, indices, weights = indptr.tolist(), indices.tolist(), weights.tolist()
+
+    for row, source in enumerate(sources):
+        best = [float("inf")] * n
+        parent = [-1] * n
+        best[source] = 0
+        heap = [(0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > best[u]:
+                continue
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                candidate = d + weights[k]
+                if candidate < best[v]:
+                    best[v] = candidate
+                    parent[v] = u
+                    heapq.heappush(heap, (candidate, v))
+        dist[row] = best
+        pred[row] = parent
+
+    return dist, pred
+
+
+def all_pairs_shortest_paths(graph, method: str = "auto", workers: int = None) -> ShortestPathMatrix:
+    """
+    Кратчайшие пути между всеми парами узлов.
+
+    method: "floyd_warshall" — векторизованный Флойд–Уоршелл (O(N³),
+    выгоден для плотных графов), "dijkstra" — Дейкстра из каждого узла
+    (O(N·E log N), выгоден для разреженных), "auto" — выбор по плотности.
+    workers > 1 распределяет запуски Дейкстры по процессам.
+    """
+    if method not in ("auto", "floyd_warshall", "dijkstra"):
+        raise ValueError(f"Неизвестный метод поиска путей: {method}.")
+
+    csr = csr_snapshot(graph)
+    _check_weights(csr)
+    n = csr.num_nodes
+    if method == "auto":
+        density = 2 * csr.num_edges / max(n * (n - 1), 1)
+        method = "floyd_warshall" if density > 0.1 else "dijkstra"
+
+    if method == "floyd_warshall":
+        dist, pred = _floyd_warshall(csr)
+    elif workers and workers > 1 and n > 1:
+        chunk = -(-n // workers)
+        parts = [range(begin, min(begin + chunk, n)) for begin in range(0, n, chunk)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(
+                _dijkstra_rows,
+                [csr.indptr] * len(parts), [csr.indices] * len(parts), [csr.weights] * len(parts), parts,
+            ))
+        dist = np.concatenate([part_dist for part_dist, _ in rows])
+        pred = np.concatenate([part_pred for _, part_pred in rows])
+    else:
+        dist, pred = _dijkstra_rows(csr.indptr, csr.indices, csr.weights, range(n))
+
+    return ShortestPathMatrix(csr.nodes, dist, pred)
+
+
+class SpanningTree:
+    """
+    Минимальное остовное дерево (для несвязного графа — лес).
+
+    sources и targets — индексы концов рёбер дерева в списке nodes,
+    weights — их веса, total_weight — суммарный вес дерева.
+    """
+
+    def __init__(self, nodes: list, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray) -> None:
+        self.nodes = nodes
+        self.sources = sources
+        self.targets = targets
+        self.weights = weights
+        self.total_weight = float(weights.sum())
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def edges(self) -> list:
+        """
+        Рёбра дерева как список пар узлов.
+        """
+        return [(self.nodes[u], self.nodes[v]) for u, v in zip(self.sources.tolist(), self.targets.tolist())]
+
+
+def _kruskal(n: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Алгоритм Краскала: рёбра перебираются по возрастанию веса, компоненты
+    хранятся в системе непересекающихся множеств на массиве родителей.
+    Возвращает номера рёбер, вошедших в остовный лес.
+    """
+    order = np.argsort(weights, kind="stable")
+    parent = list(range(n))
+    size = [1] * n
+    chosen = []
+
+    for k, u, v in zip(order.tolist(), sources[order].tolist(), targets[order].tolist()):
+        while parent[u] != u:
+            parent[u] = parent[parent[u]]
+            u = parent[u]
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        if u == v:
+            continue
+        if size[u] < size[v]:
+            u, v = v, u
+        parent[v] = u
+        size[u] += size[v]
+        chosen.append(k)
+        if len(chosen) == n - 1:
+            break
+
+    return np.array(chosen, dtype=np.intp)
+
+
+def minimum_spanning_tree(graph) -> SpanningTree:
+    """
+    Минимальное остовное дерево по CSR-снимку графа (см. core.csr).
+    Для несвязного графа возвращается минимальный остовный лес.
+    """
+    csr = csr_snapshot(graph)
+    chosen = _kruskal(csr.num_nodes, csr.edge_sources, csr.edge_targets, csr.edge_weights)
+    return SpanningTree(csr.nodes, csr.edge_sources[chosen], csr.edge_targets[chosen], csr.edge_weights[chosen])
+
+
+def prim_mst(graph: nx.Graph) -> list:
+    """
+    Рёбра минимального остовного дерева в виде списка (u, v, атрибуты ребра).
+    Сохранён для совместимости; само дерево строит minimum_spanning_tree.
+    """
+    tree = minimum_spanning_tree(graph)
+    return [(u, v, dict(graph.graph.edges[u, v])) for u, v in tree.edges()]
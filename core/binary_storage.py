@@ -0,0 +1,231 @@
+# core/binary_storage.py
+import json
+import struct
+import numpy as np
+
+BINARY_EXTENSION = ".gbin"
+
+_MAGIC = b"GRAPHBIN"
+_FORMAT_VERSION = 1
+_ALIGNMENT = 64
+
+
+def _encode_strings(values: list) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Строки в виде смещений (N + 1 чисел) и общего блока байтов UTF-8.
+    """
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _encode_numbers(values: list) -> tuple[str, np.ndarray, np.ndarray]:
+    """
+    Числа (возможно, вложенные списки) в виде типизированного массива.
+
+    Возвращает вид ("int", "float" или "mixed"), массив int64 или float64
+    и, для вида "mixed", маску значений, которые были целыми, — чтобы при
+    чтении вернуть их именно целыми, как в JSON.
+    """
+    array = np.array(values, dtype=object)
+    is_int = np.fromiter((type(value) is int for value in array.flat), dtype=bool, count=array.size)
+    if is_int.all():
+        return "int", array.astype(np.int64), None
+    if not is_int.any():
+        return "float", array.astype(np.float64), None
+    return "mixed", array.astype(np.float64), is_int.astype(np.uint8)
+
+
+def _decode_numbers(kind: str, array: np.ndarray, mask: np.ndarray) -> list:
+    """
+    Обратное к _encode_numbers: значения в виде списка чисел Python.
+    """
+    values = array.tolist()
+    if kind != "mixed":
+        return values
+    flat_values = np.asarray(array, dtype=object).ravel()
+    flat_mask = np.asarray(mask, dtype=bool).ravel()
+    flat_values[flat_mask] = [int(value) for value in flat_values[flat_mask]]
+    return flat_values.reshape(array.shape).tolist()
+
+
+class StringTable:
+    """
+    Последовательность строк, хранящаяся как смещения и блок байтов UTF-8.
+    Строки декодируются только при обращении.
+    """
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray) -> None:
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def tolist(self) -> list:
+        blob = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        return [blob[begin:end].decode("utf-8") for begin, end in zip(offsets, offsets[1:])]
+
+
+def save_graph_binary(graph, file_path: str) -> None:
+    """
+    Сохраняет граф в двоичном формате.
+
+    Файл состоит из сигнатуры, длины заголовка, JSON-заголовка с описанием
+    разделов и самих разделов — массивов NumPy, выровненных по 64 байтам:
+    идентификаторы, метки, палитра и коды цветов, позиции узлов, индексы
+    концов рёбер и веса. Числа хранятся как int64, если все они целые, и как
+    float64 иначе, так что файл читается обратно без потерь.
+    """
+    nodes = list(graph.graph.nodes(data=True))
+    edges = list(graph.graph.edges(data=True))
+    ids = [node_id for node_id, _ in nodes]
+    index = {node_id: i for i, node_id in enumerate(ids)}
+
+    sections = {}
+    if all(type(node_id) is int for node_id in ids):
+        id_kind = "int"
+        sections["ids"] = np.array(ids, dtype=np.int64)
+    elif all(isinstance(node_id, str) for node_id in ids):
+        id_kind = "str"
+        sections["id_offsets"], sections["id_data"] = _encode_strings(ids)
+    else:
+        raise ValueError("Идентификаторы узлов должны быть либо все строками, либо все целыми числами.")
+
+    sections["label_offsets"], sections["label_data"] = _encode_strings([data["label"] for _, data in nodes])
+
+    colors = [data["color"] for _, data in nodes]
+    palette = list(dict.fromkeys(colors))
+    codes = {color: code for code, color in enumerate(palette)}
+    sections["palette_offsets"], sections["palette_data"] = _encode_strings(palette)
+    sections["color_codes"] = np.array([codes[color] for color in colors], dtype=np.int32)
+
+    positions = [list(data.get("position", (0, 0))) for _, data in nodes]
+    position_kind, sections["positions"], mask = _encode_numbers(positions)
+    sections["positions"] = sections["positions"].reshape(len(nodes), 2)
+    if mask is not None:
+        sections["position_is_int"] = mask.reshape(len(nodes), 2)
+
+    sections["sources"] = np.array([index[start] for start, _, _ in edges], dtype=np.int64)
+    sections["targets"] = np.array([index[end] for _, end, _ in edges], dtype=np.int64)
+    weight_kind, sections["weights"], mask = _encode_numbers([data["weight"] for _, _, data in edges])
+    if mask is not None:
+        sections["weight_is_int"] = mask
+
+    header = {
+        "version": _FORMAT_VERSION,
+        "node_count": len(nodes),
+        "edge_count": len(edges),
+        "id_kind": id_kind,
+        "position_kind": position_kind,
+        "weight_kind": weight_kind,
+        "sections": {},
+    }
+
+    # Смещения разделов зависят от длины заголовка, а заголовок — от смещений,
+    # поэтому под заголовок резервируется место с запасом на числа смещений.
+    layout = {name: (array.dtype.str, list(array.shape)) for name, array in sections.items()}
+    reserve = len(json.dumps({**header, "sections": layout}).encode("utf-8")) + 24 * len(sections)
+    offset = _align(len(_MAGIC) + 8 + reserve)
+    for name, array in sections.items():
+        header["sections"][name] = [array.dtype.str, list(array.shape), offset]
+        offset = _align(offset + array.nbytes)
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    with open(file_path, "wb") as file:
+        file.write(_MAGIC)
+        file.write(struct.pack("<Q", len(header_bytes)))
+        file.write(header_bytes)
+        for name, array in sections.items():
+            file.seek(header["sections"][name][2])
+            file.write(np.ascontiguousarray(array).tobytes())
+        file.truncate(offset)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+class BinaryGraph:
+    """
+    Содержимое двоичного файла графа.
+
+    При mmap=True числовые разделы (позиции, концы рёбер, веса, коды цветов)
+    отображаются в память и читаются с диска по мере обращения; строки
+    хранятся в StringTable и декодируются по запросу.
+    """
+
+    def __init__(self, file_path: str, mmap: bool = True) -> None:
+        with open(file_path, "rb") as file:
+            if file.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError("Файл не является двоичным файлом графа.")
+            (length,) = struct.unpack("<Q", file.read(8))
+            header = json.loads(file.read(length).decode("utf-8"))
+        if header["version"] != _FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия двоичного формата: {header['version']}.")
+
+        self.header = header
+        self.node_count = header["node_count"]
+        self.edge_count = header["edge_count"]
+
+        self.sections = {}
+        for name, (dtype, shape, offset) in header["sections"].items():
+            count = int(np.prod(shape))
+            if count == 0:
+                array = np.empty(shape, dtype=dtype)
+            elif mmap:
+                array = np.memmap(file_path, dtype=dtype, mode="r", offset=offset, shape=tuple(shape))
+            else:
+                array = np.fromfile(file_path, dtype=dtype, count=count, offset=offset).reshape(shape)
+            self.sections[name] = array
+
+        self.positions = self.sections["positions"]
+        self.sources = self.sections["sources"]
+        self.targets = self.sections["targets"]
+        self.weights = self.sections["weights"]
+        self.color_codes = self.sections["color_codes"]
+        self.labels = StringTable(self.sections["label_offsets"], self.sections["label_data"])
+        self.palette = StringTable(self.sections["palette_offsets"], self.sections["palette_data"]).tolist()
+        if header["id_kind"] == "int":
+            self.ids = self.sections["ids"]
+        else:
+            self.ids = StringTable(self.sections["id_offsets"], self.sections["id_data"])
+
+    def id_values(self) -> list:
+        return self.ids.tolist()
+
+    def color_values(self) -> list:
+        return [self.palette[code] for code in self.color_codes.tolist()]
+
+    def position_values(self) -> list:
+        """
+        Позиции узлов как список пар, с теми же целыми и дробными числами, что были сохранены.
+        """
+        values = _decode_numbers(self.header["position_kind"], self.positions,
+                                 self.sections.get("position_is_int"))
+        return [tuple(position) for position in values]
+
+    def weight_values(self) -> list:
+        return _decode_numbers(self.header["weight_kind"], self.weights, self.sections.get("weight_is_int"))
+
+
+def load_graph_binary(graph, source) -> None:
+    """
+    Восстанавливает граф через пакетные graph.add_nodes / graph.add_edges.
+    source — путь к двоичному файлу или уже открытый BinaryGraph.
+    """
+    data = source if isinstance(source, BinaryGraph) else BinaryGraph(source)
+    ids = data.id_values()
+    graph.clear_graph()
+    graph.add_nodes(ids, labels=data.labels.tolist(), colors=data.color_values(),
+                    positions=data.position_values())
+    graph.add_edges(
+        [ids[i] for i in data.sources.tolist()],
+        [ids[i] for i in data.targets.tolist()],
+        weights=data.weight_values(),
+    )
@@ -0,0 +1,105 @@
+# core/csr.py
+import weakref
+import networkx as nx
+import numpy as np
+
+# Граф -> последний снимок CSR (версия графа хранится в самом снимке).
+_snapshot_cache = weakref.WeakKeyDictionary()
+
+
+class CSRGraph:
+    """
+    Замороженный снимок неориентированного графа в формате CSR
+    (compressed sparse row).
+
+    Соседи узла i — indices[indptr[i]:indptr[i + 1]], веса соответствующих
+    рёбер — weights[indptr[i]:indptr[i + 1]]. Каждое ребро также хранится
+    один раз в массивах edge_sources, edge_targets, edge_weights
+    (edge_sources[k] <= edge_targets[k]).
+    Узлы адресуются индексами в списке nodes.
+    """
+
+    def __init__(self, nodes: list, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray,
+                 version: int = None) -> None:
+        """
+        Принимает готовые CSR-массивы (каждое ребро записано у обоих концов,
+        петля — один раз) и выделяет из них список рёбер.
+        """
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes)}
+        self.version = version
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+        rows = np.repeat(np.arange(len(nodes), dtype=np.intp), np.diff(indptr))
+        once = indices >= rows
+        self.edge_sources = rows[once]
+        self.edge_targets = indices[once]
+        self.edge_weights = weights[once]
+
+    @classmethod
+    def from_networkx(cls, graph: nx.Graph, version: int = None) -> "CSRGraph":
+        """
+        Снимок графа NetworkX; вес ребра берётся из атрибута weight (по умолчанию 1).
+        Рёбра в edge_sources/edge_targets идут в том же порядке, что и в graph.edges.
+        """
+        nodes = list(graph.nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        adjacency = graph.adj.values()
+
+        indptr = np.zeros(len(nodes) + 1, dtype=np.intp)
+        np.cumsum([len(neighbors) for neighbors in adjacency], out=indptr[1:])
+        indices = np.array([index[v] for neighbors in adjacency for v in neighbors], dtype=np.intp)
+        weights = np.array(
+            [data.get("weight", 1) for neighbors in adjacency for data in neighbors.values()],
+            dtype=float,
+        )
+        return cls(nodes, indptr, indices, weights, version)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_sources)
+
+    def neighbors(self, i: int) -> np.ndarray:
+        """
+        Индексы соседей узла с индексом i.
+        """
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def degrees(self) -> np.ndarray:
+        """
+        Степени всех узлов (петля учитывается один раз).
+        """
+        return np.diff(self.indptr)
+
+
+def csr_snapshot(graph) -> CSRGraph:
+    """
+    Возвращает CSR-снимок графа.
+
+    Для объектов с атрибутами graph и version (core.Graph, Canvas) снимок
+    строится один раз и переиспользуется, пока не изменится version.
+    Для простого nx.Graph снимок строится при каждом вызове, готовый
+    CSRGraph возвращается как есть.
+    """
+    if isinstance(graph, CSRGraph):
+        return graph
+    if isinstance(graph, nx.Graph):
+        return CSRGraph.from_networkx(graph)
+
+    version = getattr(graph, "version", None)
+    if version is None:
+        return CSRGraph.from_networkx(graph.graph)
+
+    cached = _snapshot_cache.get(graph)
+    if cached is not None and cached.version == version:
+        return cached
+
+    snapshot = CSRGraph.from_networkx(graph.graph, version)
+    _snapshot_cache[graph] = snapshot
+    return snapshot
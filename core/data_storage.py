@@ -1,5 +1,6 @@
 # core/data_storage.py
 import json
+import re
 
 
 def serialize_graph(graph):
@@ -26,24 +27,158 @@ def serialize_graph(graph):
     return json.dumps({"nodes": nodes, "edges": edges}, indent=4)
 
 
+def _add_nodes(graph, nodes: list) -> None:
+    """
+    Добавляет пакет узлов из JSON-записей одним вызовом graph.add_nodes.
+    """
+    graph.add_nodes(
+        [node["id"] for node in nodes],
+        labels=[node["label"] for node in nodes],
+        colors=[node["color"] for node in nodes],
+        positions=[tuple(node["position"]) for node in nodes],
+    )
+
+
+def _add_edges(graph, edges: list) -> None:
+    """
+    Добавляет пакет рёбер из JSON-записей одним вызовом graph.add_edges.
+    """
+    graph.add_edges(
+        [edge["start"] for edge in edges],
+        [edge["end"] for edge in edges],
+        weights=[edge["weight"] for edge in edges],
+    )
+
+
 def deserialize_graph(graph, json_data: str) -> None:
     """
     Восстанавливает граф из JSON-данных.
     """
     data = json.loads(json_data)
     graph.clear_graph()
+    _add_nodes(graph, data["nodes"])
+    _add_edges(graph, data["edges"])
+
+
+class _JSONStream:
+    """
+    Последовательное чтение JSON из файла через буфер ограниченного размера.
+    В памяти одновременно находятся не больше одного фрагмента файла и одного значения.
+    """
+
+    _WHITESPACE = re.compile(r"\s*")
+
+    def __init__(self, file, chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """
+        Дочитывает следующий фрагмент файла, отбрасывая уже разобранную часть буфера.
+        """
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
 
-    for node in data["nodes"]:
-        graph.create_node(
-            node_id=node["id"],
-            label=node["label"],
-            color=node["color"],
-            position=tuple(node["position"])
-        )
-
-    for edge in data["edges"]:
-        graph.create_edge(
-            start=edge["start"],
-            end=edge["end"],
-            weight=edge["weight"]
-        )
+    def peek(self) -> str:
+        """
+        Следующий значимый символ (пробелы пропускаются).
+        """
+        while True:
+            self.pos = self._WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Неожиданный конец JSON-файла.")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Ожидался символ '{char}' в JSON-файле графа.")
+        self.pos += 1
+
+    def skip(self, char: str) -> bool:
+        """
+        Пропускает char, если он стоит следующим.
+        """
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self):
+        """
+        Разбирает очередное JSON-значение, при необходимости дочитывая файл.
+        Значение, упёршееся в конец буфера, считается полным только в конце файла:
+        иначе число или строка могли быть разрезаны границей фрагмента.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_graph_batches(file, batch_size: int = 10000, chunk_size: int = 1 << 20):
+    """
+    Потоково разбирает JSON-файл графа (формат serialize_graph).
+
+    Генератор отдаёт пары ("nodes" или "edges", список записей длиной не
+    больше batch_size) в порядке следования в файле, не загружая документ
+    целиком. Прочие ключи верхнего уровня пропускаются.
+    """
+    stream = _JSONStream(file, chunk_size)
+    stream.expect("{")
+    if stream.skip("}"):
+        return
+
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if key in ("nodes", "edges"):
+            stream.expect("[")
+            batch = []
+            if not stream.skip("]"):
+                while True:
+                    batch.append(stream.value())
+                    if len(batch) >= batch_size:
+                        yield key, batch
+                        batch = []
+                    if not stream.skip(","):
+                        stream.expect("]")
+                        break
+            if batch:
+                yield key, batch
+        else:
+            stream.value()
+
+        if not stream.skip(","):
+            stream.expect("}")
+            break
+
+
+def load_graph_stream(graph, file, batch_size: int = 10000) -> None:
+    """
+    Восстанавливает граф из открытого JSON-файла по частям: каждый пакет
+    узлов или рёбер сразу передаётся в graph.add_nodes / graph.add_edges.
+    Узлы в файле должны идти раньше рёбер, как их записывает serialize_graph.
+    """
+    graph.clear_graph()
+    for section, batch in iter_graph_batches(file, batch_size):
+        if section == "nodes":
+            _add_nodes(graph, batch)
+        else:
+            _add_edges(graph, batch)
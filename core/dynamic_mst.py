@@ -0,0 +1,264 @@
+# core/dynamic_mst.py
+from collections import deque
+
+from .algorithms import SpanningTree, minimum_spanning_tree
+from .graph import CLEARED, EDGES_ADDED, EDGES_REMOVED, NODES_ADDED, NODES_REMOVED
+
+
+class DynamicMST:
+    """
+    Минимальный остовный лес, поддерживаемый при вставке и удалении рёбер.
+
+    Лес хранится как словарь смежности tree: узел -> {сосед: вес}; кроме
+    того, каждое дерево подвешено за корень, и parent хранит родителя
+    каждого узла (None у корня).
+    Методы add_edge и remove_edge вызываются после того, как ребро уже
+    добавлено в граф или удалено из него, и возвращают пару списков
+    (рёбра, вошедшие в лес; рёбра, вышедшие из леса).
+
+    Если задан listener, лес подписывается на изменения модели core.Graph,
+    сам вызывает эти методы и сообщает о каждом изменении леса вызовом
+    listener(вошедшие, вышедшие). Пакет из нескольких рёбер обрабатывается
+    пересчётом леса целиком. Подписку снимает close().
+    """
+
+    def __init__(self, graph, tree: SpanningTree = None, listener=None) -> None:
+        """
+        graph — объект с атрибутом graph (nx.Graph), например Canvas или core.Graph.
+        Если tree не задан, исходный лес строится minimum_spanning_tree.
+        """
+        self.graph = graph
+        self.listener = listener
+        self._build(minimum_spanning_tree(graph) if tree is None else tree)
+        if listener is not None:
+            graph.subscribe(self._on_graph_changed)
+
+    def _build(self, tree: SpanningTree) -> None:
+        self.tree = {node: {} for node in self.graph.graph.nodes}
+        for (u, v), weight in zip(tree.edges(), tree.weights.tolist()):
+            self._link(u, v, weight)
+
+        self.parent = {}
+        for root in self.tree:
+            if root in self.parent:
+                continue
+            self.parent[root] = None
+            queue = deque([root])
+            while queue:
+                node = queue.popleft()
+                for neighbor in self.tree[node]:
+                    if neighbor not in self.parent:
+                        self.parent[neighbor] = node
+                        queue.append(neighbor)
+
+    def close(self) -> None:
+        """
+        Отписывается от изменений модели.
+        """
+        if self.listener is not None:
+            self.graph.unsubscribe(self._on_graph_changed)
+            self.listener = None
+
+    def _on_graph_changed(self, changes: list) -> None:
+        if self.listener is None:
+            return
+        for change in changes:
+            added, removed = [], []
+            if change.kind == NODES_ADDED:
+                for node in change.items:
+                    self.add_node(node)
+            elif change.kind == NODES_REMOVED:
+                for node in change.items:
+                    self.remove_node(node)
+            elif change.kind == EDGES_ADDED and len(change.items) > 1:
+                added, removed = self._rebuild()
+            elif change.kind == EDGES_ADDED:
+                u, v = change.items[0]
+                if self.graph.graph.has_edge(u, v):
+                    added, removed = self.add_edge(u, v, self.graph.graph.edges[u, v].get("weight", 1))
+            elif change.kind == EDGES_REMOVED:
+                for u, v in change.items:
+                    entered, left = self.remove_edge(u, v)
+                    added += entered
+                    removed += left
+            elif change.kind == CLEARED:
+                added, removed = [], self.edges()
+                self.tree = {}
+                self.parent = {}
+            if added or removed:
+                self.listener(added, removed)
+
+    def _rebuild(self) -> tuple[list, list]:
+        """
+        Пересчитывает лес целиком; возвращает вошедшие и вышедшие рёбра.
+        """
+        old = {frozenset(edge): edge for edge in self.edges()}
+        self._build(minimum_spanning_tree(self.graph))
+        new = {frozenset(edge): edge for edge in self.edges()}
+        return ([edge for key, edge in new.items() if key not in old],
+                [edge for key, edge in old.items() if key not in new])
+
+    @property
+    def total_weight(self) -> float:
+        return sum(sum(neighbors.values()) for neighbors in self.tree.values()) / 2
+
+    def edges(self) -> list:
+        """
+        Рёбра леса как список пар узлов.
+        """
+        seen = set()
+        edges = []
+        for u, neighbors in self.tree.items():
+            seen.add(u)
+            edges.extend((u, v) for v in neighbors if v not in seen)
+        return edges
+
+    def _link(self, u, v, weight: float) -> None:
+        self.tree.setdefault(u, {})[v] = weight
+        self.tree.setdefault(v, {})[u] = weight
+
+    def _cut(self, u, v) -> None:
+        del self.tree[u][v]
+        del self.tree[v][u]
+
+    def _walk(self, start):
+        """
+        Обход в ширину по рёбрам леса; отдаёт узлы дерева, содержащего start.
+        """
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            yield node
+            for neighbor in self.tree[node]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+
+    def _reroot(self, node) -> None:
+        """
+        Делает node корнем его дерева, разворачивая указатели parent
+        на пути от node до прежнего корня.
+        """
+        previous = None
+        while node is not None:
+            parent = self.parent[node]
+            self.parent[node] = previous
+            previous, node = node, parent
+
+    def _tree_path(self, u, v) -> list:
+        """
+        Путь из u в v по рёбрам леса или None, если они в разных деревьях.
+        От u и v поочерёдно поднимаемся к корню до первого общего предка,
+        поэтому работа пропорциональна длине пути, а не размеру дерева.
+        """
+        chains = ([u], [v])
+        depths = ({u: 0}, {v: 0})
+        active = [True, True]
+        while active[0] or active[1]:
+            for side in (0, 1):
+                if not active[side]:
+                    continue
+                chain = chains[side]
+                parent = self.parent[chain[-1]]
+                if parent is None:
+                    active[side] = False
+                    continue
+                other = depths[1 - side]
+                if parent in other:
+                    path = chain + [parent] + chains[1 - side][:other[parent]][::-1]
+                    return path if side == 0 else path[::-1]
+                depths[side][parent] = len(chain)
+                chain.append(parent)
+        return None
+
+    def _smaller_side(self, u, v) -> set:
+        """
+        Узлы меньшего из двух деревьев, содержащих u и v.
+        Оба дерева обходятся поочерёдно, поэтому работа пропорциональна меньшему.
+        """
+        walks = (self._walk(u), self._walk(v))
+        sides = (set(), set())
+        while True:
+            for walk, side in zip(walks, sides):
+                node = next(walk, None)
+                if node is None:
+                    return side
+                side.add(node)
+
+    def add_node(self, node) -> None:
+        self.tree.setdefault(node, {})
+        self.parent.setdefault(node, None)
+
+    def remove_node(self, node) -> None:
+        """
+        Убирает изолированный узел; его рёбра должны быть удалены заранее через remove_edge.
+        """
+        self.tree.pop(node, None)
+        self.parent.pop(node, None)
+
+    def add_edge(self, u, v, weight: float) -> tuple[list, list]:
+        """
+        Учитывает новое ребро: если оно соединяет разные деревья, оно входит
+        в лес; иначе оно замыкает цикл и вытесняет самое тяжёлое ребро этого
+        цикла, если оно тяжелее нового.
+        """
+        self.add_node(u)
+        self.add_node(v)
+        if u == v:
+            return [], []
+
+        path = self._tree_path(u, v)
+        if path is None:
+            self._reroot(u)
+            self.parent[u] = v
+            self._link(u, v, weight)
+            return [(u, v)], []
+
+        i = max(range(len(path) - 1), key=lambda j: self.tree[path[j]][path[j + 1]])
+        a, b = path[i], path[i + 1]
+        if self.tree[a][b] <= weight:
+            return [], []
+
+        # После разреза (a, b) нижняя часть подвешена за a или b; та из
+        # вершин u, v, что оказалась в ней, становится её корнем.
+        self._cut(a, b)
+        lower = a if self.parent[a] == b else b
+        self.parent[lower] = None
+        x, y = (u, v) if lower == a else (v, u)
+        self._reroot(x)
+        self.parent[x] = y
+        self._link(u, v, weight)
+        return [(u, v)], [(a, b)]
+
+    def remove_edge(self, u, v) -> tuple[list, list]:
+        """
+        Учитывает удалённое ребро. Удаление ребра вне леса ничего не меняет;
+        для ребра леса ищется самое лёгкое ребро графа через образовавшийся
+        разрез, причём перебираются только рёбра меньшей из двух частей.
+        """
+        if v not in self.tree.get(u, {}):
+            return [], []
+
+        self._cut(u, v)
+        lower = u if self.parent[u] == v else v
+        self.parent[lower] = None
+        side = self._smaller_side(u, v)
+
+        best, best_weight = None, float("inf")
+        adjacency = self.graph.graph.adj
+        for x in side:
+            # Узел мог быть удалён из графа вместе с ребром (remove_node).
+            for y, data in adjacency.get(x, {}).items():
+                weight = data.get("weight", 1)
+                if y not in side and weight < best_weight:
+                    best, best_weight = (x, y), weight
+
+        if best is None:
+            return [], [(u, v)]
+
+        x, y = best
+        self._reroot(x)
+        self.parent[x] = y
+        self._link(x, y, best_weight)
+        return [best], [(u, v)]
@@ -1,26 +1,116 @@
 # core/graph.py
+from contextlib import contextmanager
 import networkx as nx
+import numpy as np
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
+NODES_ADDED = "nodes_added"
+NODES_REMOVED = "nodes_removed"
+NODES_MOVED = "nodes_moved"
+EDGES_ADDED = "edges_added"
+EDGES_REMOVED = "edges_removed"
+CLEARED = "cleared"
+
+
+def _as_list(values) -> list:
+    """
+    Приводит массив NumPy или любую итерируемую последовательность к списку.
+    """
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+
+class GraphChange:
+    """
+    Изменение графа, о котором сообщается подписчикам.
+    kind — одна из констант NODES_ADDED, NODES_REMOVED, NODES_MOVED,
+    EDGES_ADDED, EDGES_REMOVED, CLEARED; items — затронутые узлы или
+    рёбра (пары узлов), для CLEARED — пустой список.
+    """
+
+    def __init__(self, kind: str, items: list) -> None:
+        self.kind = kind
+        self.items = items
+
+    def __repr__(self) -> str:
+        return f"GraphChange({self.kind!r}, {len(self.items)})"
+
 
 class Graph:
+    """
+    Модель графа — единственное хранилище его данных.
+
+    Узлы хранят атрибуты label, color и (если задана) position, рёбра —
+    weight и color. Изменения состава графа увеличивают version, перемещения
+    узлов — только positions_version, поэтому кэши, зависящие от топологии
+    и весов, переживают раскладку. Каждое изменение рассылается
+    подписчикам (subscribe) как список GraphChange; внутри блока batch()
+    уведомления копятся и рассылаются одним списком по его завершении.
+    """
+
     def __init__(self) -> None:
         """
         Инициализация графа на основе NetworkX.
         """
         self.graph = nx.Graph()
+        self.version = 0
+        self.positions_version = 0
+        self._subscribers = []
+        self._batch_depth = 0
+        self._pending = []
+
+    def subscribe(self, callback) -> None:
+        """
+        Подписывает callback(changes) на изменения графа. changes — список
+        GraphChange в порядке изменений; к моменту вызова они уже внесены в граф.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        self._subscribers.remove(callback)
+
+    @contextmanager
+    def batch(self):
+        """
+        Откладывает уведомления до конца блока with и рассылает их одним
+        списком; подряд идущие изменения одного вида объединяются.
+        Блоки могут быть вложенными, рассылка — по завершении внешнего.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._pending:
+                changes, self._pending = self._pending, []
+                for callback in list(self._subscribers):
+                    callback(changes)
+
+    def _notify(self, kind: str, items: list) -> None:
+        with self.batch():
+            if self._pending and self._pending[-1].kind == kind:
+                last = self._pending[-1]
+                last.items.extend(items)
+                if kind == NODES_MOVED:
+                    last.items = list(dict.fromkeys(last.items))
+            else:
+                self._pending.append(GraphChange(kind, list(items)))
 
     def add_node(self, node_id: str, label: str = "",
-                 color: str = "blue") -> None:
+                 color: str = "blue", position: tuple[float, float] = None) -> None:
         """
         Добавление узла с атрибутами.
         """
         if node_id in self.graph.nodes:
             raise ValueError(f"Узел с идентификатором {node_id} уже существует.")
-        self.graph.add_node(node_id, label=label, color=color)
+        attributes = {"label": label, "color": color}
+        if position is not None:
+            attributes["position"] = position
+        self.graph.add_node(node_id, **attributes)
+        self.version += 1
         logging.info(f"Узел {node_id} добавлен: метка={label}, цвет={color}")
+        self._notify(NODES_ADDED, [node_id])
 
     def add_edge(self, start: str, end: str, weight: float = 1.0, color: str = "black") -> None:
         """
@@ -31,7 +121,73 @@ class Graph:
         if self.graph.has_edge(start, end):
             raise ValueError(f"Ребро между {start} и {end} уже существует.")
         self.graph.add_edge(start, end, weight=weight, color=color)
+        self.version += 1
         logging.info(f"Ребро добавлено: {start} -> {end}, вес={weight}, цвет={color}")
+        self._notify(EDGES_ADDED, [(start, end)])
+
+    def add_nodes(self, node_ids, labels=None, colors=None, positions=None) -> None:
+        """
+        Пакетное добавление узлов: одна проверка, одна вставка и одна запись в журнал.
+        labels и colors — последовательности той же длины (по умолчанию "" и "blue"),
+        positions — последовательность пар или массив N × 2 (по умолчанию позиции не задаются).
+        """
+        node_ids = _as_list(node_ids)
+        count = len(node_ids)
+        labels = [""] * count if labels is None else _as_list(labels)
+        colors = ["blue"] * count if colors is None else _as_list(colors)
+        if positions is not None:
+            positions = [tuple(position) for position in _as_list(positions)]
+        if not len(labels) == len(colors) == count or positions is not None and len(positions) != count:
+            raise ValueError("Длины списков узлов, меток и цветов не совпадают.")
+
+        new_ids = set(node_ids)
+        if len(new_ids) != count:
+            raise ValueError("Идентификаторы узлов в пакете повторяются.")
+        existing = new_ids.intersection(self.graph.nodes)
+        if existing:
+            raise ValueError(f"Узел с идентификатором {next(iter(existing))} уже существует.")
+
+        self.graph.add_nodes_from(
+            (node_id, {"label": label, "color": color})
+            for node_id, label, color in zip(node_ids, labels, colors)
+        )
+        if positions is not None:
+            nodes = self.graph.nodes
+            for node_id, position in zip(node_ids, positions):
+                nodes[node_id]["position"] = position
+        self.version += 1
+        logging.info(f"Добавлено узлов: {count}")
+        self._notify(NODES_ADDED, node_ids)
+
+    def add_edges(self, starts, ends, weights=None, colors=None) -> None:
+        """
+        Пакетное добавление рёбер: одна проверка, одна вставка и одна запись в журнал.
+        weights и colors — последовательности той же длины (по умолчанию 1.0 и "black").
+        """
+        starts = _as_list(starts)
+        ends = _as_list(ends)
+        count = len(starts)
+        weights = [1.0] * count if weights is None else _as_list(weights)
+        colors = ["black"] * count if colors is None else _as_list(colors)
+        if not len(ends) == len(weights) == len(colors) == count:
+            raise ValueError("Длины списков концов рёбер, весов и цветов не совпадают.")
+
+        nodes = self.graph.nodes
+        seen = set()
+        for start, end in zip(starts, ends):
+            if start not in nodes or end not in nodes:
+                raise ValueError("Оба узла должны существовать в графе.")
+            if (start, end) in seen or (end, start) in seen or self.graph.has_edge(start, end):
+                raise ValueError(f"Ребро между {start} и {end} уже существует.")
+            seen.add((start, end))
+
+        self.graph.add_edges_from(
+            (start, end, {"weight": weight, "color": color})
+            for start, end, weight, color in zip(starts, ends, weights, colors)
+        )
+        self.version += 1
+        logging.info(f"Добавлено рёбер: {count}")
+        self._notify(EDGES_ADDED, list(zip(starts, ends)))
 
     def remove_node(self, node_id: str) -> None:
         """
@@ -39,8 +195,14 @@ class Graph:
         """
         if node_id not in self.graph.nodes:
             raise ValueError(f"Узел {node_id} не существует.")
+        edges = list(self.graph.edges(node_id))
         self.graph.remove_node(node_id)
+        self.version += 1
         logging.info(f"Узел {node_id} и все связанные с ним рёбра удалены.")
+        with self.batch():
+            if edges:
+                self._notify(EDGES_REMOVED, edges)
+            self._notify(NODES_REMOVED, [node_id])
 
     def remove_edge(self, start: str, end: str) -> None:
         """
@@ -49,25 +211,93 @@ class Graph:
         if not self.graph.has_edge(start, end):
             raise ValueError(f"Ребро между {start} и {end} не существует.")
         self.graph.remove_edge(start, end)
+        self.version += 1
         logging.info(f"Ребро {start} -> {end} удалено.")
+        self._notify(EDGES_REMOVED, [(start, end)])
+
+    def move_nodes(self, positions: dict) -> None:
+        """
+        Задаёт позиции узлов (узел -> пара координат) одним изменением.
+        Топология не меняется, поэтому увеличивается только positions_version.
+        """
+        missing = next((node_id for node_id in positions if node_id not in self.graph.nodes), None)
+        if missing is not None:
+            raise ValueError(f"Узел {missing} не существует.")
+        nodes = self.graph.nodes
+        for node_id, position in positions.items():
+            nodes[node_id]["position"] = tuple(position)
+        self.positions_version += 1
+        logging.debug(f"Перемещено узлов: {len(positions)}")
+        self._notify(NODES_MOVED, list(positions))
+
+    def clear_graph(self) -> None:
+        """
+        Удаление всех узлов и рёбер.
+        """
+        self.graph.clear()
+        self.version += 1
+        logging.info("Граф очищен.")
+        self._notify(CLEARED, [])
 
-    def from_weight_matrix(self, matrix: list) -> None:
+    def from_weight_matrix(self, matrix) -> None:
         """
-        Создание графа из матрицы весов.
+        Создание графа из матрицы весов (массив NumPy или вложенные списки).
+
+        Ячейки 0, "0" и "-" означают отсутствие ребра. Граф неориентированный,
+        поэтому если заданы обе ячейки (i, j) и (j, i), вес берётся из той,
+        что стоит позже при обходе по строкам, то есть из нижнего треугольника.
         """
+        weights, present = _parse_weight_matrix(matrix)
+
         self.graph.clear()
+        self.version += 1
         logging.info("Граф очищен перед построением из матрицы.")
 
-        for i in range(len(matrix)):
-            self.graph.add_node(i, label=f"Узел {i}")
-
-        for i, row in enumerate(matrix):
-            for j, value in enumerate(row):
-                if value not in [0, "-", "0"]:
-                    try:
-                        weight = float(value)
-                        self.graph.add_edge(i, j, weight=weight)
-                        logging.debug(f"Ребро {i} -> {j} добавлено с весом {weight}.")
-                    except ValueError:
-                        logging.error(f"Некорректное значение матрицы: {value} в позиции ({i}, {j}).")
-                        raise ValueError(f"Некорректное значение матрицы: {value} в позиции ({i}, {j})")
\ No newline at end of file
+        n = len(weights)
+        self.graph.add_nodes_from((i, {"label": f"Узел {i}", "color": "blue"}) for i in range(n))
+
+        # Для пары i <= j вес из (j, i), если эта ячейка задана, иначе из (i, j).
+        merged = np.where(present.T, weights.T, weights)
+        rows, cols = np.nonzero(np.triu(present | present.T))
+        self.graph.add_edges_from(
+            (i, j, {"weight": weight})
+            for i, j, weight in zip(rows.tolist(), cols.tolist(), merged[rows, cols].tolist())
+        )
+        logging.debug(f"Добавлено рёбер из матрицы: {len(rows)}.")
+        with self.batch():
+            self._notify(CLEARED, [])
+            self._notify(NODES_ADDED, list(range(n)))
+            self._notify(EDGES_ADDED, list(zip(rows.tolist(), cols.tolist())))
+
+
+def _parse_weight_matrix(matrix) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Разбирает матрицу весов за одно преобразование в массив.
+    Возвращает веса float и маску заданных рёбер.
+    """
+    try:
+        array = np.asarray(matrix)
+    except ValueError:
+        raise ValueError("Матрица весов должна быть квадратной.")
+    if array.ndim != 2 or array.shape[0] != array.shape[1]:
+        raise ValueError("Матрица весов должна быть квадратной.")
+
+    if array.dtype.kind in "biuf":
+        return array.astype(float), array != 0
+
+    # Строки и смешанные значения: сравнение и приведение выполняются над
+    # массивом объектов, а позиция ищется только при ошибке.
+    cells = array.astype(object) if isinstance(matrix, np.ndarray) else np.array(matrix, dtype=object)
+    present = ~((cells == 0) | (cells == "-") | (cells == "0"))
+    weights = np.zeros(array.shape)
+    try:
+        weights[present] = np.fromiter(map(float, cells[present]), dtype=float, count=int(present.sum()))
+    except (TypeError, ValueError):
+        for i, j in zip(*np.nonzero(present)):
+            try:
+                float(cells[i, j])
+            except (TypeError, ValueError):
+                logging.error(f"Некорректное значение матрицы: {cells[i, j]} в позиции ({i}, {j}).")
+                raise ValueError(f"Некорректное значение матрицы: {cells[i, j]} в позиции ({i}, {j})")
+        raise
+    return weights, present
@@ -1,22 +1,37 @@
 # core/layout.py
+from collections import deque
 import networkx as nx
 import numpy as np
 
+from .csr import CSRGraph, csr_snapshot
+from .quadtree import barnes_hut_repulsion
 
-def kamada_kawai_layout(graph: nx.Graph) -> dict:
+REPULSION_METHODS = ("exact", "barnes_hut")
+
+
+def kamada_kawai_layout(graph: nx.Graph, initial_pos: dict = None) -> dict:
     """
     Рассчитывает расположение узлов по методу Камада-Кавай.
+    graph — nx.Graph или CSRGraph (для него рёбра берутся без весов, как в
+    остальных расположениях).
+    Если задан initial_pos, оптимизация начинается с этих позиций (тёплый старт).
     """
-    if not isinstance(graph, nx.Graph):
-        raise ValueError("Ожидался объект NetworkX Graph.")
+    _check_graph(graph)
+    csr = None
+    if isinstance(graph, CSRGraph):
+        csr, nodes = graph, graph.nodes
+        graph = nx.Graph()
+        graph.add_nodes_from(nodes)
+        graph.add_edges_from((nodes[u], nodes[v])
+                             for u, v in zip(csr.edge_sources.tolist(), csr.edge_targets.tolist()))
 
-    if not graph.nodes:
-        raise ValueError("Граф не содержит узлов.")
+    start = None
+    if initial_pos:
+        csr = csr or csr_snapshot(graph)
+        start_pos, warm = _initial_positions(csr, initial_pos, np.random.rand(csr.num_nodes, 2))
+        start = dict(zip(csr.nodes, start_pos)) if warm else None
 
-    if not graph.edges:
-        raise ValueError("Граф не содержит рёбер.")
-
-    layout = nx.kamada_kawai_layout(graph)
+    layout = nx.kamada_kawai_layout(graph, pos=start)
 
     if not layout:
         raise ValueError("Алгоритм Камада-Кавай не вернул расположение для узлов.")
@@ -24,52 +39,278 @@ def kamada_kawai_layout(graph: nx.Graph) -> dict:
     return layout
 
 
-def force_directed_layout(graph: nx.Graph, iterations: int = 50, k: float = 1.0, gravity: float = 0.1) -> dict:
+def _edge_index(csr: CSRGraph) -> tuple[np.ndarray, np.ndarray]:
     """
-    Рассчитывает расположение узлов по силовому методу.
+    Возвращает массивы индексов концов рёбер (без петель).
     """
-    if not isinstance(graph, nx.Graph):
+    keep = csr.edge_sources != csr.edge_targets
+    return csr.edge_sources[keep], csr.edge_targets[keep]
+
+
+def _initial_positions(csr: CSRGraph, initial_pos: dict, random_pos: np.ndarray) -> tuple[np.ndarray, bool]:
+    """
+    Начальные позиции для тёплого старта.
+
+    Узлы из initial_pos сохраняют свои позиции. Новые узлы ставятся рядом
+    с центром уже размещённых соседей (в порядке обхода в ширину, чтобы
+    цепочки новых узлов тоже оказались рядом), а узлы без размещённых
+    соседей — в случайную точку габаритов известной части графа.
+    Возвращает позиции и признак того, что тёплый старт применён.
+    """
+    if not initial_pos:
+        return random_pos, False
+
+    index = csr.index
+    pos = np.array(random_pos, dtype=float)
+    placed = np.zeros(csr.num_nodes, dtype=bool)
+    for node, xy in initial_pos.items():
+        if node in index:
+            pos[index[node]] = xy
+            placed[index[node]] = True
+    if not placed.any():
+        return random_pos, False
+    if placed.all():
+        return pos, True
+
+    known = pos[placed]
+    low, high = known.min(axis=0), known.max(axis=0)
+    spread = max(float((high - low).max()) / np.sqrt(placed.sum()), 1e-3)
+
+    queue = deque(np.flatnonzero(placed).tolist())
+    while queue:
+        node = queue.popleft()
+        for i in csr.neighbors(node).tolist():
+            if placed[i]:
+                continue
+            anchors = csr.neighbors(i)
+            pos[i] = pos[anchors[placed[anchors]]].mean(axis=0) + (np.random.random(2) - 0.5) * spread
+            placed[i] = True
+            queue.append(i)
+
+    rest = ~placed
+    pos[rest] = low + np.random.random((rest.sum(), 2)) * np.maximum(high - low, spread)
+    return pos, True
+
+
+def _exact_repulsion(pos: np.ndarray, exponent: int = 1, block: int = 512) -> np.ndarray:
+    """
+    Суммарные силы отталкивания между всеми парами узлов.
+
+    Сила, действующая на узел i со стороны j, равна diff / |diff| ** (exponent + 1),
+    где diff = pos[i] - pos[j]. Матрица расстояний считается блоками строк,
+    чтобы память не росла как N² × 2.
+    """
+    forces = np.empty_like(pos)
+    x, y = pos[:, 0], pos[:, 1]
+    for begin in range(0, len(pos), block):
+        dx = x[begin:begin + block, None] - x[None, :]
+        dy = y[begin:begin + block, None] - y[None, :]
+        scale = np.maximum(dx * dx + dy * dy, 1e-18)
+        if exponent == 1:
+            np.reciprocal(scale, out=scale)
+        else:
+            scale **= -(exponent + 1) / 2
+        forces[begin:begin + block, 0] = np.einsum("ij,ij->i", dx, scale)
+        forces[begin:begin + block, 1] = np.einsum("ij,ij->i", dy, scale)
+    return forces
+
+
+def _repulsion(pos: np.ndarray, method: str, theta: float, exponent: int = 1) -> np.ndarray:
+    """
+    Силы отталкивания выбранным методом: точным O(N²) или Барнса–Хата O(N log N).
+    """
+    if method == "barnes_hut":
+        return barnes_hut_repulsion(pos, theta=theta, exponent=exponent)
+    return _exact_repulsion(pos, exponent=exponent)
+
+
+def _attraction(pos: np.ndarray, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Единичные силы притяжения вдоль рёбер, приложенные к обоим концам.
+    """
+    forces = np.zeros_like(pos)
+    diff = pos[targets] - pos[sources]
+    dist = np.maximum(np.linalg.norm(diff, axis=1), 1e-9)[:, None]
+    np.add.at(forces, sources, diff / dist)
+    np.add.at(forces, targets, -diff / dist)
+    return forces
+
+
+def _adaptive_step(step: float, energy: float, prev_energy: float, progress: int,
+                   cooling: float = 0.9, max_step: float = np.inf) -> tuple[float, int]:
+    """
+    Адаптивное охлаждение (схема Ю. Ху): шаг растёт (не выше max_step) после
+    пяти подряд уменьшений энергии и уменьшается, как только энергия
+    перестаёт падать.
+    """
+    if energy < prev_energy:
+        progress += 1
+        if progress >= 5:
+            return min(step / cooling, max_step), 0
+        return step, progress
+    return step * cooling, 0
+
+
+# Тёплый старт продолжает уже остывшее расположение: шаг не поднимается
+# выше WARM_STEP, а расчёт останавливается, когда энергия перестаёт заметно
+# меняться (относительное изменение меньше WARM_ENERGY_RTOL).
+WARM_STEP = 0.03
+WARM_ENERGY_RTOL = 1e-3
+
+# Расчёт считается сошедшимся, когда среднее смещение узла за итерацию,
+# отнесённое к размеру расположения и усреднённое за PLATEAU_WINDOW
+# последних итераций, становится меньше tol.
+PLATEAU_WINDOW = 10
+
+
+def _relative_motion(old: np.ndarray, new: np.ndarray) -> float:
+    """
+    Среднее смещение узла между позициями old и new, отнесённое к большей
+    стороне прямоугольника, охватывающего new.
+    """
+    extent = max(float(np.ptp(new, axis=0).max()), 1e-9)
+    return float(np.linalg.norm(new - old, axis=1).mean()) / extent
+
+
+def _plateau(motions: deque, tol: float) -> bool:
+    """Истина, если окно motions заполнено и среднее смещение в нём меньше tol."""
+    return len(motions) == motions.maxlen and sum(motions) < tol * motions.maxlen
+
+
+def _check_graph(graph: nx.Graph, repulsion: str = REPULSION_METHODS[0], need_edges: bool = True) -> None:
+    """
+    Проверяет граф (nx.Graph или CSRGraph) и метод отталкивания перед запуском расположения.
+    """
+    if isinstance(graph, CSRGraph):
+        node_count, edge_count = graph.num_nodes, graph.num_edges
+    elif isinstance(graph, nx.Graph):
+        node_count, edge_count = graph.number_of_nodes(), graph.number_of_edges()
+    else:
         raise ValueError("Ожидался объект NetworkX Graph.")
-    if not graph.nodes:
+    if not node_count:
         raise ValueError("Граф не содержит узлов.")
-    if not graph.edges:
+    if need_edges and not edge_count:
         raise ValueError("Граф не содержит рёбер.")
+    if repulsion not in REPULSION_METHODS:
+        raise ValueError(f"Неизвестный метод отталкивания: {repulsion}.")
 
-    pos = {node: np.random.rand(2) for node in graph.nodes}
 
-    for _ in range(iterations):
-        new_pos = {node: pos[node].copy() for node in graph.nodes}
+def _check_steps(iterations: int, every: int = 1) -> None:
+    """
+    Проверяет число итераций и период снимков итеративного расположения.
+    """
+    if iterations < 0:
+        raise ValueError("Число итераций не может быть отрицательным.")
+    if every < 1:
+        raise ValueError("Период снимков every должен быть не меньше 1.")
 
-        for node in graph.nodes:
-            force = np.zeros(2)
 
-            for neighbor in graph.neighbors(node):
-                diff = pos[neighbor] - pos[node]
-                distance = max(np.linalg.norm(diff), 1e-9)
-                force += diff / distance
+def _snapshots(steps, every: int, convert, start: np.ndarray):
+    """
+    Прореживает поток итераций: отдаёт convert(позиции) каждые every итераций и после последней.
+    Если не выполнено ни одной итерации, отдаёт начальные позиции start с номером 0.
+    """
+    pos, used, last_sent = start, 0, None
+    for pos, used in steps:
+        if used % every == 0:
+            last_sent = used
+            yield convert(pos), used
+    if last_sent != used:
+        yield convert(pos), used
 
-            for other_node in graph.nodes:
-                if other_node == node:
-                    continue
-                diff = pos[node] - pos[other_node]
-                distance = max(np.linalg.norm(diff), 1e-9)
-                force += diff / (distance ** 2)
 
-            force -= pos[node] * gravity
+def _force_directed_steps(pos: np.ndarray, sources: np.ndarray, targets: np.ndarray, iterations: int,
+                          k: float, gravity: float, repulsion: str, theta: float, tol: float,
+                          warm: bool = False):
+    """
+    Итерации силового метода из начальных позиций pos: после каждой отдаёт
+    массив позиций и номер итерации.
+    """
+    max_force = 10.0
+    step, max_step = (WARM_STEP, WARM_STEP) if warm else (1.0, np.inf)
+    energy, progress = np.inf, 0
+    motions = deque(maxlen=PLATEAU_WINDOW)
 
-            max_force = 10.0
-            if np.linalg.norm(force) > max_force:
-                force = force / np.linalg.norm(force) * max_force
+    for used in range(1, iterations + 1):
+        force = _attraction(pos, sources, targets) + _repulsion(pos, repulsion, theta) - pos * gravity
 
-            new_pos[node] += force * k
+        norms = np.linalg.norm(force, axis=1)
+        too_large = norms > max_force
+        force[too_large] *= (max_force / norms[too_large])[:, None]
 
-        center = np.mean(list(new_pos.values()), axis=0)
-        for node in new_pos:
-            new_pos[node] -= center
+        new_energy = float(np.sum(norms ** 2))
+        step, progress = _adaptive_step(step, new_energy, energy, progress, max_step=max_step)
+        plateau = warm and abs(energy - new_energy) < WARM_ENERGY_RTOL * new_energy
+        energy = new_energy
+        displacement = force * k * step
 
+        new_pos = pos + displacement
+        new_pos -= new_pos.mean(axis=0)
+        motions.append(_relative_motion(pos, new_pos))
         pos = new_pos
+        yield pos, used
+
+        if _plateau(motions, tol) or plateau:
+            return
+
+
+def force_directed_layout(graph: nx.Graph, iterations: int = 50, k: float = 1.0, gravity: float = 0.1,
+                          repulsion: str = "exact", theta: float = 0.5, tol: float = 5e-3,
+                          callback=None, initial_pos: dict = None) -> tuple[dict, int]:
+    """
+    Рассчитывает расположение узлов по силовому методу.
+
+    Позиции хранятся в одном массиве N × 2, а силы притяжения и отталкивания
+    вычисляются пакетными операциями NumPy. При repulsion="barnes_hut"
+    отталкивание приближается квадродеревом с параметром точности theta.
+
+    iterations — верхняя граница: расчёт останавливается, как только
+    среднее смещение узла за итерацию в последних PLATEAU_WINDOW итерациях
+    становится меньше доли tol от размера расположения.
+    Если задан callback, он вызывается после каждой итерации как
+    callback(итерация, iterations); возврат False прерывает расчёт.
+
+    initial_pos (узел → позиция) включает тёплый старт: расчёт начинается
+    с этих позиций, новые узлы ставятся рядом с соседями, а шаг
+    ограничивается малым значением, чтобы не разрушить уже найденное
+    расположение.
+    Возвращает расположение и число фактически выполненных итераций.
+    """
+    _check_graph(graph, repulsion)
+    _check_steps(iterations)
+    csr = csr_snapshot(graph)
+    nodes = csr.nodes
+    sources, targets = _edge_index(csr)
+    start, warm = _initial_positions(csr, initial_pos, np.random.rand(len(nodes), 2))
 
-    return pos
+    pos, used = start, 0
+    for pos, used in _force_directed_steps(start, sources, targets, iterations, k, gravity,
+                                           repulsion, theta, tol, warm=warm):
+        if callback is not None and callback(used, iterations) is False:
+            break
+    return dict(zip(nodes, pos)), used
+
+
+def iter_force_directed_layout(graph: nx.Graph, every: int = 5, iterations: int = 50, k: float = 1.0,
+                               gravity: float = 0.1, repulsion: str = "exact", theta: float = 0.5,
+                               tol: float = 5e-3, initial_pos: dict = None):
+    """
+    Потоковый вариант force_directed_layout.
+
+    Генератор отдаёт пары (расположение, номер итерации) каждые every
+    итераций и после последней. Прервать расчёт можно, просто перестав
+    читать генератор.
+    """
+    _check_graph(graph, repulsion)
+    _check_steps(iterations, every)
+    csr = csr_snapshot(graph)
+    nodes = csr.nodes
+    sources, targets = _edge_index(csr)
+    start, warm = _initial_positions(csr, initial_pos, np.random.rand(len(nodes), 2))
+
+    steps = _force_directed_steps(start, sources, targets, iterations, k, gravity, repulsion, theta, tol,
+                                  warm=warm)
+    yield from _snapshots(steps, every, lambda pos: dict(zip(nodes, pos)), start)
 
 
 def random_layout(graph: nx.Graph) -> dict:
@@ -85,55 +326,138 @@ def random_layout(graph: nx.Graph) -> dict:
     return nx.random_layout(graph)
 
 
-def spring_layout(graph: nx.Graph, canvas) -> None:
+def _random_box_positions(n: int, width: float, height: float) -> np.ndarray:
     """
-    Реализует пружинный алгоритм для расположения узлов графа.
+    Случайные позиции в центральной части прямоугольника width × height.
+    """
+    box = np.array([width, height], dtype=float)
+    return np.random.random((n, 2)) * 0.8 * box + 0.1 * box
+
+
+def _spring_steps(pos: np.ndarray, sources: np.ndarray, targets: np.ndarray, width: float, height: float,
+                  iterations: int, repulsion: str, theta: float, tol: float, warm: bool = False):
+    """
+    Итерации пружинного алгоритма из начальных позиций pos: после каждой
+    отдаёт массив позиций и номер итерации.
     """
-    screen_size = canvas.scene.width(), canvas.scene.height()
-    screen_w, screen_h = screen_size
     const_charge = 100000
     const_spring = 0.001
     spring_equ_len = 10
-    max_iterations = 200
     dt = 0.1
-    bodies = []
-
-    for node_id in graph.nodes():
-        pos = np.random.random(2) * 0.8 * np.array([screen_w, screen_h]) + 0.1 * np.array([screen_w, screen_h])
-        bodies.append({'id': node_id, 'pos': pos, 'vel': np.zeros(2)})
-
-    def edge_exists(body_a, body_b) -> bool:
-        return graph.has_edge(body_a['id'], body_b['id'])
-
-    def unit(v: np.ndarray) -> np.ndarray:
-        norm = np.linalg.norm(v)
-        return v / norm if norm > 1e-9 else np.zeros_like(v)
-
-    def update_body_physics(bods, dt: float) -> None:
-        for body_a in bods:
-            f_net = np.zeros(2)
-            for body_b in bods:
-                if body_a['id'] == body_b['id']:
-                    continue
-                ab = body_b['pos'] - body_a['pos']
-                _ab = max(np.linalg.norm(ab), 1e-9)
-                f_s = const_spring * unit(ab) * (_ab - spring_equ_len) if edge_exists(body_a, body_b) else 0
-                f_c = const_charge * unit(ab) / _ab**2
-                f_net += f_s - f_c
-            body_a['vel'] += f_net * dt
-            body_a['vel'] *= 0.99
-            body_a['pos'] += body_a['vel'] * dt
-            body_a['pos'] = np.clip(body_a['pos'], 0, [screen_w, screen_h])
-
-    for _ in range(max_iterations):
-        update_body_physics(bodies, dt)
-
-    p_avg = np.mean([body['pos'] for body in bodies], axis=0)
-    max_pos = np.max([body['pos'] for body in bodies], axis=0)
-    min_pos = np.min([body['pos'] for body in bodies], axis=0)
-    scale = min(screen_w / (max_pos[0] - min_pos[0] + 1e-9), screen_h / (max_pos[1] - min_pos[1] + 1e-9))
-    for body in bodies:
-        node_item = canvas.nodes[body['id']][0]
-        pos = (body['pos'] - p_avg) * scale + np.array(screen_size) / 2
-        pos[1] = screen_h - pos[1]
-        node_item.setPos(pos[0], pos[1])
+    damping = 0.99
+    box = np.array([width, height], dtype=float)
+
+    pos = np.clip(pos, 0, box)
+    vel = np.zeros_like(pos)
+    step, max_step = (WARM_STEP, WARM_STEP) if warm else (1.0, np.inf)
+    energy, progress = np.inf, 0
+    motions = deque(maxlen=PLATEAU_WINDOW)
+
+    for used in range(1, iterations + 1):
+        diff = pos[targets] - pos[sources]
+        dist = np.maximum(np.linalg.norm(diff, axis=1), 1e-9)[:, None]
+        spring = const_spring * diff / dist * (dist - spring_equ_len)
+
+        force = const_charge * _repulsion(pos, repulsion, theta, exponent=2)
+        np.add.at(force, sources, spring)
+        np.add.at(force, targets, -spring)
+
+        new_energy = float(np.einsum("ij,ij->", force, force))
+        step, progress = _adaptive_step(step, new_energy, energy, progress, max_step=max_step)
+        plateau = warm and abs(energy - new_energy) < WARM_ENERGY_RTOL * new_energy
+        energy = new_energy
+
+        vel += force * dt * step
+        vel *= damping
+        new_pos = np.clip(pos + vel * dt, 0, box)
+        motions.append(_relative_motion(pos, new_pos))
+        pos = new_pos
+        yield pos, used
+
+        if _plateau(motions, tol) or plateau:
+            return
+
+
+def _fit_to_box(pos: np.ndarray, width: float, height: float) -> np.ndarray:
+    """
+    Центрирует и масштабирует позиции под прямоугольник width × height.
+    """
+    box = np.array([width, height], dtype=float)
+    p_avg = pos.mean(axis=0)
+    extent = pos.max(axis=0) - pos.min(axis=0) + 1e-9
+    scale = min(box / extent)
+    return (pos - p_avg) * scale + box / 2
+
+
+def spring_positions(n: int, sources: np.ndarray, targets: np.ndarray, width: float, height: float,
+                     iterations: int = 200, repulsion: str = "exact", theta: float = 0.5,
+                     tol: float = 7e-4, callback=None, initial: np.ndarray = None,
+                     warm: bool = False) -> tuple[np.ndarray, int]:
+    """
+    Пружинный алгоритм над массивами: возвращает позиции N × 2 в прямоугольнике width × height.
+
+    Рёбра задаются массивами индексов концов sources и targets. Пружинные
+    силы считаются по этим массивам, электрические — для всех пар сразу
+    (или методом Барнса–Хата при repulsion="barnes_hut").
+
+    Расчёт останавливается раньше iterations, когда среднее смещение узла
+    за итерацию выходит на плато, как в force_directed_layout. callback вызывается после каждой итерации так же, как
+    в force_directed_layout. initial (N × 2) задаёт начальные позиции
+    вместо случайных; warm=True включает режим тёплого старта (малый шаг
+    и остановка по выходу энергии на плато). Возвращает позиции и число фактически выполненных
+    итераций.
+    """
+    if repulsion not in REPULSION_METHODS:
+        raise ValueError(f"Неизвестный метод отталкивания: {repulsion}.")
+    _check_steps(iterations)
+
+    start = _random_box_positions(n, width, height) if initial is None else initial
+    pos, used = start, 0
+    for pos, used in _spring_steps(start, sources, targets, width, height, iterations, repulsion, theta, tol,
+                                   warm=warm):
+        if callback is not None and callback(used, iterations) is False:
+            break
+    return _fit_to_box(pos, width, height), used
+
+
+def spring_layout(graph: nx.Graph, width: float, height: float, iterations: int = 200,
+                  repulsion: str = "exact", theta: float = 0.5, tol: float = 7e-4,
+                  callback=None, initial_pos: dict = None) -> tuple[dict, int]:
+    """
+    Реализует пружинный алгоритм для расположения узлов графа в прямоугольнике width × height.
+
+    initial_pos (узел → позиция в том же прямоугольнике) включает тёплый
+    старт, как в force_directed_layout.
+    Возвращает расположение и число фактически выполненных итераций.
+    """
+    _check_graph(graph, repulsion, need_edges=False)
+    csr = csr_snapshot(graph)
+    nodes = csr.nodes
+    sources, targets = _edge_index(csr)
+    start, warm = _initial_positions(csr, initial_pos,
+                                     _random_box_positions(len(nodes), width, height))
+    pos, used = spring_positions(len(nodes), sources, targets, width, height,
+                                 iterations=iterations, repulsion=repulsion, theta=theta, tol=tol,
+                                 callback=callback, initial=start, warm=warm)
+    return dict(zip(nodes, pos)), used
+
+
+def iter_spring_layout(graph: nx.Graph, width: float, height: float, every: int = 5, iterations: int = 200,
+                       repulsion: str = "exact", theta: float = 0.5, tol: float = 7e-4,
+                       initial_pos: dict = None):
+    """
+    Потоковый вариант spring_layout.
+
+    Генератор отдаёт пары (расположение, номер итерации) каждые every
+    итераций и после последней; каждый снимок уже вписан в прямоугольник.
+    """
+    _check_graph(graph, repulsion, need_edges=False)
+    _check_steps(iterations, every)
+    csr = csr_snapshot(graph)
+    nodes = csr.nodes
+    sources, targets = _edge_index(csr)
+
+    start, warm = _initial_positions(csr, initial_pos,
+                                     _random_box_positions(len(nodes), width, height))
+    steps = _spring_steps(start, sources, targets, width, height, iterations, repulsion, theta, tol, warm=warm)
+    yield from _snapshots(steps, every, lambda pos: dict(zip(nodes, _fit_to_box(pos, width, height))), start)
@@ -0,0 +1,153 @@
+# core/quadtree.py
+import numpy as np
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """
+    Раздвигает 16 младших битов числа так, чтобы между ними стояли нули.
+    """
+    values = values & 0xFFFF
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    values = (values | (values << 1)) & 0x55555555
+    return values
+
+
+class QuadTree:
+    """
+    Квадродерево над массивом точек N × 2, построенное без рекурсии.
+
+    Точки упорядочиваются по коду Мортона, поэтому ячейки каждого уровня
+    образуют непрерывные отрезки, а дети ячейки — непрерывный отрезок
+    ячеек следующего уровня. Для каждой ячейки хранятся число точек
+    и центр масс.
+    """
+
+    def __init__(self, pos: np.ndarray, max_depth: int = 16) -> None:
+        """
+        Строит дерево глубины max_depth (не больше 16) по позициям pos.
+        """
+        self.depth = min(max_depth, 16)
+        self.n = len(pos)
+
+        low = pos.min(axis=0)
+        self.size = max(float((pos.max(axis=0) - low).max()), 1e-9) * (1 + 1e-9)
+        grid = np.floor((pos - low) / self.size * (1 << self.depth)).astype(np.int64)
+        grid = np.clip(grid, 0, (1 << self.depth) - 1)
+        morton = (_spread_bits(grid[:, 0]) << 1) | _spread_bits(grid[:, 1])
+
+        self.order = np.argsort(morton, kind="stable")
+        self.pos = pos[self.order]
+        morton = morton[self.order]
+
+        self.counts = []
+        self.centers = []
+        self.body_cell = []
+        codes_by_level = []
+        for level in range(self.depth + 1):
+            codes = morton >> (2 * (self.depth - level))
+            boundaries = np.flatnonzero(np.diff(codes)) + 1
+            starts = np.concatenate(([0], boundaries))
+            counts = np.diff(np.append(starts, self.n))
+            body_cell = np.zeros(self.n, dtype=np.intp)
+            body_cell[boundaries] = 1
+
+            codes_by_level.append(codes[starts])
+            self.counts.append(counts)
+            self.centers.append(np.add.reduceat(self.pos, starts, axis=0) / counts[:, None])
+            self.body_cell.append(np.cumsum(body_cell))
+        self.leaf_start = starts
+
+        self.child_start = []
+        self.child_end = []
+        for level in range(self.depth):
+            parents = codes_by_level[level + 1] >> 2
+            self.child_start.append(np.searchsorted(parents, codes_by_level[level], side="left"))
+            self.child_end.append(np.searchsorted(parents, codes_by_level[level], side="right"))
+
+    def repulsion(self, theta: float = 0.5, exponent: int = 1, chunk: int = 4096) -> np.ndarray:
+        """
+        Приближённые силы отталкивания diff / |diff| ** (exponent + 1) для всех точек.
+
+        Ячейка заменяется своим центром масс, если её ширина, делённая на
+        расстояние до центра, меньше theta. Точки обрабатываются порциями
+        по chunk штук, поэтому объём памяти не зависит от N².
+        """
+        forces = np.zeros((self.n, 2))
+        for begin in range(0, self.n, chunk):
+            bodies = np.arange(begin, min(begin + chunk, self.n))
+            forces[begin:begin + len(bodies)] = self._chunk_repulsion(bodies, theta, exponent)
+
+        result = np.empty_like(forces)
+        result[self.order] = forces
+        return result
+
+    def _chunk_repulsion(self, bodies: np.ndarray, theta: float, exponent: int) -> np.ndarray:
+        """
+        Обходит дерево по уровням сразу для всех пар (точка, ячейка) порции.
+        """
+        offset = bodies[0]
+        forces = np.zeros((len(bodies), 2))
+        frontier_bodies = bodies
+        frontier_cells = np.zeros(len(bodies), dtype=np.intp)
+
+        for level in range(self.depth + 1):
+            if not len(frontier_bodies):
+                break
+
+            mass = self.counts[level][frontier_cells].astype(float)
+            center = self.centers[level][frontier_cells]
+            body_pos = self.pos[frontier_bodies]
+            contains = self.body_cell[level][frontier_bodies] == frontier_cells
+
+            if level == self.depth:
+                # Точки, попавшие в один лист последнего уровня, отталкиваются
+                # друг от друга точно, попарно.
+                own = contains & (mass > 1)
+                own_bodies = frontier_bodies[own]
+                counts = self.counts[level][frontier_cells[own]]
+                first = np.repeat(np.cumsum(counts) - counts, counts)
+                others = (np.repeat(self.leaf_start[frontier_cells[own]], counts)
+                          + np.arange(counts.sum()) - first)
+                own_bodies = np.repeat(own_bodies, counts)
+                distinct = others != own_bodies
+                frontier_bodies = np.concatenate((frontier_bodies[~contains], own_bodies[distinct]))
+                center = np.concatenate((center[~contains], self.pos[others[distinct]]))
+                mass = np.concatenate((mass[~contains], np.ones(distinct.sum())))
+                body_pos = self.pos[frontier_bodies]
+                accept = np.ones(len(frontier_bodies), dtype=bool)
+            else:
+                diff = body_pos - center
+                dist_sq = np.einsum("ij,ij->i", diff, diff)
+                width = self.size / (1 << level)
+                accept = ~contains & ((mass == 1) | (width * width < theta * theta * dist_sq))
+
+            diff = body_pos[accept] - center[accept]
+            dist_sq = np.maximum(np.einsum("ij,ij->i", diff, diff), 1e-18)
+            scale = mass[accept] * dist_sq ** (-(exponent + 1) / 2)
+            local = frontier_bodies[accept] - offset
+            forces[:, 0] += np.bincount(local, weights=diff[:, 0] * scale, minlength=len(bodies))
+            forces[:, 1] += np.bincount(local, weights=diff[:, 1] * scale, minlength=len(bodies))
+
+            if level == self.depth:
+                break
+
+            expand = ~accept & ~(contains & (mass == 1))
+            parent_bodies = frontier_bodies[expand]
+            parent_cells = frontier_cells[expand]
+            starts = self.child_start[level][parent_cells]
+            counts = self.child_end[level][parent_cells] - starts
+
+            frontier_bodies = np.repeat(parent_bodies, counts)
+            first = np.repeat(np.cumsum(counts) - counts, counts)
+            frontier_cells = np.repeat(starts, counts) + np.arange(counts.sum()) - first
+
+        return forces
+
+
+def barnes_hut_repulsion(pos: np.ndarray, theta: float = 0.5, exponent: int = 1) -> np.ndarray:
+    """
+    Силы отталкивания методом Барнса–Хата за O(N log N).
+    """
+    return QuadTree(pos).repulsion(theta=theta, exponent=exponent)
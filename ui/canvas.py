@@ -1,18 +1,64 @@
 # ui/canvas.py
 from PyQt5.QtWidgets import (
     QGraphicsView, QGraphicsScene, QGraphicsEllipseItem,
-    QGraphicsLineItem, QGraphicsTextItem
+    QGraphicsLineItem, QGraphicsTextItem, QGraphicsPathItem
 )
-from PyQt5.QtGui import QBrush, QPen, QColor, QFont
+from PyQt5.QtGui import QBrush, QPen, QColor, QFont, QPainterPath
 from PyQt5.QtCore import Qt, QPointF, QTimer
-from math import atan2, cos, sin
+from math import atan2, cos, sin, pi
 import networkx as nx
+import numpy as np
 
+from core.binary_storage import load_graph_binary
+from core.dynamic_mst import DynamicMST
+from core.graph import (
+    CLEARED, EDGES_ADDED, EDGES_REMOVED, NODES_ADDED, NODES_MOVED, NODES_REMOVED, Graph, GraphChange, _as_list
+)
+from .edge_batch_item import EdgeBatchItem
+from .lazy_view import LazyGraphView
 
-class Canvas(QGraphicsView):
-    """Класс Canvas для визуализации и взаимодействия с графом."""
 
-    def __init__(self, parent=None):
+class NodeItem(QGraphicsEllipseItem):
+    """Эллипс узла, сообщающий холсту о своём перемещении."""
+
+    def __init__(self, canvas, x: float, y: float, width: float, height: float):
+        super().__init__(x, y, width, height)
+        self.canvas = canvas
+        self.setFlag(QGraphicsEllipseItem.ItemSendsGeometryChanges)
+
+    def itemChange(self, change, value):
+        """Помечает инцидентные рёбра устаревшими при любом перемещении узла."""
+        if change == QGraphicsEllipseItem.ItemPositionHasChanged:
+            self.canvas.mark_node_dirty(self.data(0))
+        return super().itemChange(change, value)
+
+
+class Canvas(QGraphicsView):
+    """
+    Класс Canvas для визуализации и взаимодействия с графом.
+
+    При масштабе меньше LABEL_ZOOM_THRESHOLD подписи узлов и весов скрываются,
+    при масштабе меньше EDGE_BATCH_ZOOM_THRESHOLD все рёбра рисуются одним
+    контуром вместо отдельных линий. Подписи узлов и весов создаются только
+    для узлов и рёбер, попавших в видимую область при достаточном масштабе;
+    подписи вне её удаляются, когда всего подписей больше MAX_LABELS.
+
+    В режиме пакетной отрисовки (set_batched_edges) рёбра-отрезки рисуются
+    одним элементом EdgeBatchItem, а в self.edges для них хранится None;
+    петли и в этом режиме остаются отдельными элементами.
+
+    Данные графа хранит модель core.Graph (self.model): методы правки холста
+    изменяют её, а элементы сцены создаются, удаляются и перемещаются
+    обработчиком её уведомлений, поэтому правка модели напрямую тоже
+    отражается на холсте. self.nodes, self.node_labels, self.edges
+    и self.edge_labels — только элементы сцены.
+    """
+
+    LABEL_ZOOM_THRESHOLD = 0.6
+    EDGE_BATCH_ZOOM_THRESHOLD = 0.3
+    MAX_LABELS = 2000
+
+    def __init__(self, parent=None, model: Graph = None):
         super().__init__(parent)
 
         self.node_color = Qt.gray
@@ -23,108 +69,222 @@ class Canvas(QGraphicsView):
         self.shortest_path_color = QColor(0, 255, 0)
 
         self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(20)
         self.update_timer.timeout.connect(self.update_graph)
-        self.update_timer.start(20)
+        self.dirty_nodes = set()
+        self.unplaced_nodes = set()
+        self.moved_nodes = set()
+        self.pushing_positions = False
+
+        self.detail_timer = QTimer(self)
+        self.detail_timer.setSingleShot(True)
+        self.detail_timer.setInterval(30)
+        self.detail_timer.timeout.connect(self.update_level_of_detail)
+        self.labels_visible = True
+        self.edges_batched = False
+        self.edge_path_dirty = False
 
         self.scene = QGraphicsScene(self)
+        # Узлы и рёбра перемещаются пакетами (расположения, перетаскивание), и
+        # BSP-индекс сцены перестраивался бы на каждый setLine и setPos; без
+        # индекса поиск элементов в области — линейный проход по сцене.
+        self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
         self.setScene(self.scene)
-        self.graph = nx.Graph()
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.edge_path = QGraphicsPathItem()
+        self.edge_path.setPen(QPen(self.edge_color, self.edge_thickness))
+        self.edge_path.setZValue(-1)
+        self.edge_path.setVisible(False)
+        self.scene.addItem(self.edge_path)
+        self.edge_batch = None
+        self.model = Graph() if model is None else model
+        self.model.subscribe(self._on_graph_changed)
 
         self.nodes = {}
+        self.node_labels = {}
         self.edges = {}
         self.edge_labels = {}
+        self.incident_edges = {}
+        self.dynamic_mst = None
+        self.highlighted_edges = {}
+        self.highlighted_nodes = set()
+        self.lazy_view = None
         self.selected_node = None
         self.offset = QPointF()
 
+        if self.model.graph:
+            self._on_graph_changed([
+                GraphChange(NODES_ADDED, list(self.model.graph.nodes)),
+                GraphChange(EDGES_ADDED, list(self.model.graph.edges)),
+            ])
+
+    @property
+    def graph(self) -> nx.Graph:
+        """Граф NetworkX модели."""
+        return self.model.graph
+
+    @property
+    def version(self) -> int:
+        return self.model.version
+
     def create_node(self, node_id: str, label: str, color: str = "blue", position: tuple[float, float] = None):
         """Создаёт новый узел на холсте."""
-        if node_id in self.nodes:
-            raise ValueError(f"Node with ID {node_id} already exists.")
-
-        if position is None:
+        unplaced = position is None
+        if unplaced:
             position = (50 * len(self.nodes), 50)
 
-        self.graph.add_node(node_id, label=label, color=color, position=position)
+        self.model.add_node(node_id, label, color, position)
+        if unplaced:
+            self.unplaced_nodes.add(node_id)
 
+        print(f"Node {node_id} created at position {position}")
+
+    def _create_node_item(self, node_id: str, color: str, position: tuple[float, float]):
+        """
+        Создаёт эллипс узла и добавляет его на сцену.
+        Подпись создаётся позже, когда узел окажется в видимой области.
+        """
         radius = 20
         x, y = position
-        ellipse = QGraphicsEllipseItem(x, y, radius * 2, radius * 2)
+        ellipse = NodeItem(self, x, y, radius * 2, radius * 2)
         ellipse.setBrush(QBrush(QColor(color)))
         ellipse.setFlag(QGraphicsEllipseItem.ItemIsMovable)
         ellipse.setData(0, node_id)
         ellipse.setAcceptHoverEvents(True)
         ellipse.setFlag(QGraphicsEllipseItem.ItemIsSelectable)
 
-        text = QGraphicsTextItem(label)
+        self.scene.addItem(ellipse)
+        self.nodes[node_id] = ellipse
+        self.incident_edges[node_id] = set()
+
+    def _create_node_label(self, node_id: str):
+        """Создаёт подпись узла; она дочерняя для эллипса и перемещается вместе с ним."""
+        ellipse = self.nodes[node_id]
+        text = QGraphicsTextItem(self.graph.nodes[node_id].get("label", ""))
         text.setParentItem(ellipse)
         text.setDefaultTextColor(Qt.black)
         text.setPos(
             ellipse.rect().center().x() - text.boundingRect().width() / 2,
             ellipse.rect().center().y() - text.boundingRect().height() / 2
         )
+        text.setVisible(self.labels_visible)
+        self.node_labels[node_id] = text
 
-        self.scene.addItem(ellipse)
-        self.nodes[node_id] = (ellipse, text)
+    def _create_edge_item(self, start: str, end: str, weight, line: tuple = None):
+        """
+        Создаёт линию (или петлю) ребра и добавляет её на сцену.
+        line — заранее рассчитанные концы отрезка (x1, y1, x2, y2); без него
+        они вычисляются по положению узлов.
+        Подпись веса создаётся позже, когда ребро окажется в видимой области.
+        """
+        start_node = self.nodes[start]
+        end_node = self.nodes[end]
 
-        print(f"Node {node_id} created at position {position}")
+        if start == end:
+            rect = start_node.rect().adjusted(15, 15, -15, -15)
+            edge = QGraphicsEllipseItem(rect)
+            edge.setPen(QPen(self.edge_color, self.edge_thickness))
+        else:
+            if line is None:
+                line = self._edge_geometry(start_node, end_node)
+            if self.edge_batch is not None:
+                edge = None
+                self.edge_batch.add((start, end), line, self.edge_color, self.edge_thickness)
+            else:
+                edge = QGraphicsLineItem(*line)
+                edge.setPen(QPen(self.edge_color, self.edge_thickness))
+
+        if edge is not None:
+            edge.setData(0, start)
+            edge.setData(1, end)
+            edge.setVisible(not self.edges_batched)
+            self.scene.addItem(edge)
+        self.edges[(start, end)] = edge
+        self.incident_edges[start].add((start, end))
+        self.incident_edges[end].add((start, end))
+        self.schedule_detail_update(edges_changed=True)
+
+    def _create_edge_label(self, edge_key: tuple):
+        """Создаёт подпись веса ребра."""
+        start, end = edge_key
+        label = QGraphicsTextItem(str(self.graph.edges[start, end]['weight']))
+        label.setDefaultTextColor(Qt.red)
+        label.setFont(QFont("Arial", 12))
+        label.setVisible(self.labels_visible)
+        # Половина размера подписи для центрирования: текст не меняется, считается один раз.
+        label.setData(0, (label.boundingRect().width() / 2, label.boundingRect().height() / 2))
+        self.scene.addItem(label)
+        self.edge_labels[edge_key] = label
+        self._place_edge_label(edge_key, label)
+
+    def add_nodes(self, node_ids, labels=None, colors=None, positions=None):
+        """
+        Пакетно создаёт узлы: проверка за один проход, одна вставка в граф
+        и одна перерисовка сцены. labels и colors — последовательности той же
+        длины (по умолчанию пустые метки и синий цвет), positions —
+        последовательность пар или массив N × 2; без positions узлы ставятся
+        в позиции по умолчанию, как в create_node.
+        """
+        node_ids = _as_list(node_ids)
+        unplaced = positions is None
+        if unplaced:
+            positions = [(50 * (len(self.nodes) + k), 50) for k in range(len(node_ids))]
+
+        self.model.add_nodes(node_ids, labels=labels, colors=colors, positions=positions)
+        if unplaced:
+            self.unplaced_nodes.update(node_ids)
+
+        print(f"Добавлено узлов: {len(node_ids)}")
+
+    def add_edges(self, starts, ends, weights=None):
+        """
+        Пакетно создаёт рёбра: проверка за один проход, одна вставка в граф
+        и одна перерисовка сцены. weights — последовательность той же длины
+        (по умолчанию 1). Отслеживаемое остовное дерево пересчитывается один раз.
+        """
+        starts = _as_list(starts)
+        weights = [1] * len(starts) if weights is None else weights
+        self.model.add_edges(starts, ends, weights=weights)
+
+        print(f"Добавлено рёбер: {len(starts)}")
 
     def delete_node(self, node_id: str):
         """Удаляет узел и все связанные с ним рёбра."""
         if node_id not in self.nodes:
             return
 
-        edges_to_delete = [edge_key for edge_key in self.edges if node_id in edge_key]
-        for edge_key in edges_to_delete:
-            self.delete_edge(*edge_key)
+        self.model.remove_node(node_id)
 
-        self.graph.remove_node(node_id)
-
-        node, label = self.nodes.pop(node_id)
-        self.scene.removeItem(node)
+    def node_position(self, node_id: str) -> tuple[float, float]:
+        """
+        Возвращает позицию узла в координатах сцены — левый верхний угол эллипса,
+        как в параметре position метода create_node.
+        """
+        node = self.nodes[node_id]
+        position = node.pos() + node.rect().topLeft()
+        return position.x(), position.y()
+
+    def placed_positions(self) -> dict:
+        """Позиции узлов, которые уже были размещены пользователем, файлом или расположением."""
+        return {
+            node_id: self.node_position(node_id)
+            for node_id in self.nodes
+            if node_id not in self.unplaced_nodes
+        }
 
     def update_node_position(self, node_id: str):
         """Обновляет позицию узла в графе после его перемещения."""
         if node_id not in self.nodes:
             raise ValueError(f"Node {node_id} does not exist.")
 
-        node = self.nodes[node_id][0]
-        position = node.pos()
-        self.graph.nodes[node_id]['position'] = (position.x(), position.y())
-        print(f"Позиция узла {node_id} обновлена на ({position.x()}, {position.y()})")
+        x, y = self.node_position(node_id)
+        self._push_node_positions([node_id])
+        print(f"Позиция узла {node_id} обновлена на ({x}, {y})")
 
     def create_edge(self, start: str, end: str, weight: int = 1):
         """Создаёт новое ребро между двумя узлами."""
-        if not (start in self.nodes and end in self.nodes):
-            raise ValueError("Both nodes must exist to create an edge.")
-
-        if self.graph.has_edge(start, end) or self.graph.has_edge(end, start):
-            raise ValueError(f"Edge between {start} and {end} already exists.")
-
-        self.graph.add_edge(start, end, weight=weight)
-
-        start_node = self.nodes[start][0]
-        end_node = self.nodes[end][0]
-
-        if start == end:
-            rect = start_node.rect().adjusted(15, 15, -15, -15)
-            edge = QGraphicsEllipseItem(rect)
-            edge.setPen(QPen(self.edge_color, self.edge_thickness))
-        else:
-            edge = QGraphicsLineItem()
-            self.update_edge_position(edge, start_node, end_node)
-            edge.setPen(QPen(self.edge_color, self.edge_thickness))
-
-        edge.setData(0, start)
-        edge.setData(1, end)
-        self.scene.addItem(edge)
-        self.edges[(start, end)] = edge
-
-        label = QGraphicsTextItem(str(weight))
-        label.setDefaultTextColor(Qt.red)
-        label.setFont(QFont("Arial", 12))
-        self.scene.addItem(label)
-        self.edge_labels[(start, end)] = label
-        self.update_edge_label_position(edge, label, start_node, end_node)
+        self.model.add_edge(start, end, weight)
 
         print(f"Ребро между {start} и {end} с весом {weight} добавлено.")
 
@@ -133,55 +293,264 @@ class Canvas(QGraphicsView):
         if not self.graph.has_edge(start, end):
             return
 
-        self.graph.remove_edge(start, end)
+        self.model.remove_edge(start, end)
+
+    def _on_graph_changed(self, changes: list):
+        """Приводит элементы сцены в соответствие с изменениями модели."""
+        self.setUpdatesEnabled(False)
+        try:
+            for change in changes:
+                if change.kind == NODES_ADDED:
+                    self._add_node_items(change.items)
+                elif change.kind == NODES_REMOVED:
+                    self._remove_node_items(change.items)
+                elif change.kind == NODES_MOVED:
+                    self._move_node_items(change.items)
+                elif change.kind == EDGES_ADDED:
+                    self._add_edge_items(change.items)
+                elif change.kind == EDGES_REMOVED:
+                    self._remove_edge_items(change.items)
+                elif change.kind == CLEARED:
+                    self._clear_items()
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _add_node_items(self, node_ids: list):
+        nodes = self.graph.nodes
+        for node_id in node_ids:
+            data = nodes[node_id]
+            position = data.get("position")
+            if position is None:
+                position = (50 * len(self.nodes), 50)
+                self.unplaced_nodes.add(node_id)
+            self._create_node_item(node_id, data.get("color", "blue"), position)
+
+    def _remove_node_items(self, node_ids: list):
+        for node_id in node_ids:
+            self.dirty_nodes.discard(node_id)
+            self.moved_nodes.discard(node_id)
+            self.unplaced_nodes.discard(node_id)
+            self.highlighted_nodes.discard(node_id)
+            del self.incident_edges[node_id]
+            self.node_labels.pop(node_id, None)
+            self.scene.removeItem(self.nodes.pop(node_id))
+
+    def _move_node_items(self, node_ids: list):
+        """Ставит эллипсы узлов в позиции из модели и пересчитывает их рёбра."""
+        if self.pushing_positions:
+            # Позиции пришли с самого холста: элементы уже на месте.
+            return
+        nodes = self.graph.nodes
+        for node_id in node_ids:
+            node = self.nodes[node_id]
+            x, y = nodes[node_id]["position"]
+            node.setPos(x - node.rect().x(), y - node.rect().y())
+        self.moved_nodes.difference_update(node_ids)
+        self.update_graph()
+
+    def _add_edge_items(self, edge_keys: list):
+        lines = self._edge_lines(edge_keys).tolist()
+        edges = self.graph.edges
+        for (start, end), line in zip(edge_keys, lines):
+            self._create_edge_item(start, end, edges[start, end].get("weight", 1), line)
+
+    def _remove_edge_items(self, edge_keys: list):
+        for start, end in edge_keys:
+            edge_key = self._edge_key(start, end)
+            self.incident_edges[start].discard(edge_key)
+            self.incident_edges[end].discard(edge_key)
+
+            self.highlighted_edges.pop(edge_key, None)
+            edge = self.edges.pop(edge_key)
+            if edge is not None:
+                self.scene.removeItem(edge)
+            else:
+                self.edge_batch.remove(edge_key)
+
+            label = self.edge_labels.pop(edge_key, None)
+            if label:
+                self.scene.removeItem(label)
+        self.schedule_detail_update(edges_changed=True)
+
+    @staticmethod
+    def _edge_geometry(start_node: QGraphicsEllipseItem, end_node: QGraphicsEllipseItem) -> tuple:
+        """Концы отрезка ребра (x1, y1, x2, y2) на границах эллипсов узлов."""
+        start_center = start_node.scenePos() + start_node.rect().center()
+        end_center = end_node.scenePos() + end_node.rect().center()
+
+        angle = atan2(end_center.y() - start_center.y(), end_center.x() - start_center.x())
+        start_offset = QPointF(cos(angle) * start_node.rect().width() / 2, sin(angle) * start_node.rect().height() / 2)
+        end_offset = QPointF(cos(angle + pi) * end_node.rect().width() / 2, sin(angle + pi) * end_node.rect().height() / 2)
+
+        return (
+            start_center.x() + start_offset.x(),
+            start_center.y() + start_offset.y(),
+            end_center.x() + end_offset.x(),
+            end_center.y() + end_offset.y()
+        )
+
+    def _node_boxes(self, node_ids: list) -> np.ndarray:
+        """Центры и полуоси эллипсов узлов: массив N × 4 (cx, cy, rx, ry)."""
+        boxes = []
+        for node_id in node_ids:
+            node = self.nodes[node_id]
+            rect = node.rect()
+            center = node.scenePos() + rect.center()
+            boxes.append((center.x(), center.y(), rect.width() / 2, rect.height() / 2))
+        return np.array(boxes, dtype=float).reshape(-1, 4)
+
+    def _edge_lines(self, edge_keys: list) -> np.ndarray:
+        """
+        Концы отрезков рёбер на границах эллипсов узлов, как в _edge_geometry,
+        но для всех рёбер сразу: массив E × 4 (x1, y1, x2, y2).
+        """
+        node_ids = list(dict.fromkeys(node_id for edge_key in edge_keys for node_id in edge_key))
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        boxes = self._node_boxes(node_ids)
+        count = len(edge_keys)
+        start = boxes[np.fromiter((index[a] for a, _ in edge_keys), dtype=np.intp, count=count)]
+        end = boxes[np.fromiter((index[b] for _, b in edge_keys), dtype=np.intp, count=count)]
+
+        direction = end[:, :2] - start[:, :2]
+        length = np.hypot(direction[:, 0], direction[:, 1])[:, None]
+        # Для совпадающих центров atan2(0, 0) = 0, то есть направление (1, 0).
+        unit = np.where(length > 0, direction / np.where(length > 0, length, 1), (1.0, 0.0))
+        return np.hstack((start[:, :2] + unit * start[:, 2:], end[:, :2] - unit * end[:, 2:]))
+
+    def _place_edges(self, edge_keys):
+        """
+        Пересчитывает положения рёбер и их подписей одним векторным проходом
+        и применяет их пакетом. Петли не перемещаются.
+        """
+        edge_keys = [edge_key for edge_key in edge_keys if edge_key[0] != edge_key[1]]
+        if not edge_keys:
+            return
+        lines = self._edge_lines(edge_keys)
+        midpoints = ((lines[:, :2] + lines[:, 2:]) / 2).tolist()
+
+        self.setUpdatesEnabled(False)
+        try:
+            batched = np.fromiter((self.edges[edge_key] is None for edge_key in edge_keys),
+                                  dtype=bool, count=len(edge_keys))
+            if batched.any():
+                self.edge_batch.set_lines([edge_keys[i] for i in np.flatnonzero(batched).tolist()],
+                                          lines[batched])
+            for i in np.flatnonzero(~batched).tolist():
+                self.edges[edge_keys[i]].setLine(*lines[i].tolist())
+
+            for edge_key, (x, y) in zip(edge_keys, midpoints):
+                label = self.edge_labels.get(edge_key)
+                if label is not None:
+                    half_width, half_height = label.data(0)
+                    label.setPos(x - half_width, y - half_height)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _place_edge_label(self, edge_key: tuple, label: QGraphicsTextItem):
+        """Ставит подпись веса в середину ребра (подписи петель не перемещаются)."""
+        edge = self.edges[edge_key]
+        if edge is None:
+            x1, y1, x2, y2 = self.edge_batch.line(edge_key)
+        elif isinstance(edge, QGraphicsLineItem):
+            line = edge.line()
+            x1, y1, x2, y2 = line.x1(), line.y1(), line.x2(), line.y2()
+        else:
+            return
+        half_width, half_height = label.data(0)
+        label.setPos((x1 + x2) / 2 - half_width, (y1 + y2) / 2 - half_height)
+
+    def _set_edge_style(self, edge_key: tuple, color, width: float):
+        """Задаёт цвет и толщину линии ребра."""
+        edge = self.edges[edge_key]
+        if edge is None:
+            self.edge_batch.set_style(edge_key, color, width)
+        else:
+            edge.setPen(QPen(color, width))
 
-        edge = self.edges.pop((start, end), None)
-        if edge:
-            self.scene.removeItem(edge)
+    def _edge_key(self, start: str, end: str):
+        """Ключ ребра в self.edges в любом порядке концов или None, если ребра нет."""
+        if (start, end) in self.edges:
+            return start, end
+        if (end, start) in self.edges:
+            return end, start
+        return None
 
-        label = self.edge_labels.pop((start, end), None)
-        if label:
-            self.scene.removeItem(label)
+    def set_batched_edges(self, enabled: bool):
+        """
+        Включает или выключает пакетную отрисовку рёбер одним элементом EdgeBatchItem.
+        Существующие рёбра переносятся в новый режим с сохранением выделения.
+        """
+        if enabled == (self.edge_batch is not None):
+            return
 
-    def update_edge_position(self, edge: QGraphicsLineItem, start_node: QGraphicsEllipseItem, end_node: QGraphicsEllipseItem):
-        """Обновляет позицию ребра."""
-        if isinstance(edge, QGraphicsLineItem):
-            start_center = start_node.scenePos() + start_node.rect().center()
-            end_center = end_node.scenePos() + end_node.rect().center()
-
-            angle = atan2(end_center.y() - start_center.y(), end_center.x() - start_center.x())
-            start_offset = QPointF(cos(angle) * start_node.rect().width() / 2, sin(angle) * start_node.rect().height() / 2)
-            end_offset = QPointF(cos(angle + 3.14) * end_node.rect().width() / 2, sin(angle + 3.14) * end_node.rect().height() / 2)
-
-            edge.setLine(
-                start_center.x() + start_offset.x(),
-                start_center.y() + start_offset.y(),
-                end_center.x() + end_offset.x(),
-                end_center.y() + end_offset.y()
-            )
-
-    def update_edge_label_position(self, edge: QGraphicsLineItem, label: QGraphicsTextItem, start_node: QGraphicsEllipseItem, end_node: QGraphicsEllipseItem):
-        """Обновляет позицию метки ребра."""
-        if isinstance(edge, QGraphicsLineItem):
-            line = edge.line()
-            midpoint = QPointF(
-                (line.x1() + line.x2()) / 2,
-                (line.y1() + line.y2()) / 2
-            )
-            label.setPos(midpoint - QPointF(label.boundingRect().width() / 2, label.boundingRect().height() / 2))
+        self.setUpdatesEnabled(False)
+        try:
+            if enabled:
+                self.edge_batch = EdgeBatchItem(max(len(self.edges), 1024))
+                self.edge_batch.setZValue(-1)
+                self.scene.addItem(self.edge_batch)
+                keys, lines, colors, widths = [], [], [], []
+                for edge_key, edge in self.edges.items():
+                    if isinstance(edge, QGraphicsLineItem):
+                        line = edge.line()
+                        keys.append(edge_key)
+                        lines.append((line.x1(), line.y1(), line.x2(), line.y2()))
+                        colors.append(edge.pen().color().rgba())
+                        widths.append(edge.pen().widthF())
+                        self.scene.removeItem(edge)
+                self.edge_batch.extend(keys, np.array(lines, dtype=float).reshape(-1, 4), colors, widths)
+                for edge_key in keys:
+                    self.edges[edge_key] = None
+            else:
+                batch, self.edge_batch = self.edge_batch, None
+                for edge_key in list(batch.keys):
+                    color, width = batch.style(edge_key)
+                    edge = QGraphicsLineItem(*batch.line(edge_key))
+                    edge.setPen(QPen(color, width))
+                    edge.setData(0, edge_key[0])
+                    edge.setData(1, edge_key[1])
+                    edge.setVisible(not self.edges_batched)
+                    self.scene.addItem(edge)
+                    self.edges[edge_key] = edge
+                self.scene.removeItem(batch)
+        finally:
+            self.setUpdatesEnabled(True)
+        self.schedule_detail_update(edges_changed=True)
 
     def update_edges(self):
         """Обновляет позиции всех рёбер."""
-        for (start, end), edge in self.edges.items():
-            start_node = self.nodes[start][0]
-            end_node = self.nodes[end][0]
-            self.update_edge_position(edge, start_node, end_node)
-            self.update_edge_label_position(edge, self.edge_labels[(start, end)], start_node, end_node)
+        self._place_edges(list(self.edges))
+        self.schedule_detail_update(edges_changed=True)
+
+    def mark_node_dirty(self, node_id: str):
+        """
+        Помечает узел перемещённым и планирует пересчёт его рёбер. Позиция
+        попадает в модель по окончании перетаскивания (mouseReleaseEvent).
+        """
+        if node_id not in self.nodes:
+            return
+        self.unplaced_nodes.discard(node_id)
+        self.dirty_nodes.add(node_id)
+        self.moved_nodes.add(node_id)
+        if not self.update_timer.isActive():
+            self.update_timer.start()
 
     def update_graph(self):
-        """Метод, вызываемый таймером для обновления графа."""
-        self.update_edges()
-        self.scene.update()
+        """Пересчитывает только рёбра, инцидентные перемещённым узлам."""
+        if not self.dirty_nodes:
+            return
+
+        if len(self.dirty_nodes) == len(self.nodes):
+            dirty_edges = list(self.edges)
+        else:
+            dirty_edges = set()
+            for node_id in self.dirty_nodes:
+                dirty_edges.update(self.incident_edges[node_id])
+        self.dirty_nodes.clear()
+
+        self._place_edges(dirty_edges)
+        if self.edges_batched:
+            self.schedule_detail_update(edges_changed=True)
 
     def mouseMoveEvent(self, event):
         """
@@ -191,101 +560,283 @@ class Canvas(QGraphicsView):
         if self.selected_node:
             new_pos = self.mapToScene(event.pos()) - self.offset
             self.selected_node.setPos(new_pos)
-
-            node_id = self.selected_node.data(0)
-
-            for (start, end), edge in self.edges.items():
-                if start == node_id or end == node_id:
-                    start_node = self.nodes[start][0]
-                    end_node = self.nodes[end][0]
-                    self.update_edge_position(edge, start_node, end_node)
-                    self.update_edge_label_position(edge, self.edge_labels[(start, end)], start_node, end_node)
-
-            self.scene.update()
+            self.update_graph()
 
         super().mouseMoveEvent(event)
 
     def mouseReleaseEvent(self, event):
         """
         Обрабатывает отпускание ЛКМ.
-        Завершает перемещение узла.
+        Завершает перемещение узла и переносит позиции перетащенных
+        узлов в модель одним изменением.
         """
         self.selected_node = None
         super().mouseReleaseEvent(event)
+        if self.moved_nodes:
+            self._push_node_positions(list(self.moved_nodes))
+
+    def apply_layout(self, layout: dict):
+        """
+        Переносит рассчитанные позиции узлов в модель одним изменением:
+        холст переставляет узлы и пересчитывает рёбра сразу, а окно
+        перерисовывается один раз.
+        """
+        self.model.move_nodes({
+            node_id: (float(x), float(y))
+            for node_id, (x, y) in layout.items()
+            if node_id in self.nodes
+        })
 
     def sync_all_node_positions(self):
         """Синхронизирует позиции всех узлов в графе."""
-        for node_id, (node_item, _) in self.nodes.items():
-            self.update_node_position(node_id)
+        self._push_node_positions(list(self.nodes))
 
-    def highlight_mst(self, mst_edges):
+    def _push_node_positions(self, node_ids: list):
+        """
+        Записывает текущие позиции элементов узлов в модель одним изменением.
+        Уведомление о нём не переставляет элементы повторно.
+        """
+        self.moved_nodes.difference_update(node_ids)
+        self.pushing_positions = True
+        try:
+            self.model.move_nodes({node_id: self.node_position(node_id) for node_id in node_ids})
+        finally:
+            self.pushing_positions = False
+
+    def highlight_mst(self, tree, dynamic: bool = False):
         """
         Метод для выделения рёбер минимального остовного дерева (MST).
-        :param mst_edges: Список рёбер минимального остовного дерева.
-        """
-        self.clear_highlighted_paths()
-        for edge in mst_edges:
-            if isinstance(edge, tuple) and len(edge) == 3:
-                start, end, _ = edge
-                if (start, end) in self.edges:
-                    edge_item = self.edges[(start, end)]
-                    edge_item.setPen(QPen(self.mst_edge_color, self.edge_thickness))
-                elif (end, start) in self.edges:
-                    edge_item = self.edges[(end, start)]
-                    edge_item.setPen(QPen(self.mst_edge_color, self.edge_thickness))
-            else:
-                print(f"Некорректный элемент в mst_edges: {edge}")
-
-        self.scene.update()
+        :param tree: Результат core.minimum_spanning_tree (индексы концов рёбер в tree.nodes).
+        :param dynamic: Поддерживать дерево и выделение при добавлении и удалении рёбер,
+            пока выделение не будет сброшено.
+        """
+        self._stop_dynamic_mst()
+        nodes = tree.nodes
+        style = (QColor(self.mst_edge_color), self.edge_thickness)
+        edges = {}
+        for u, v in zip(tree.sources.tolist(), tree.targets.tolist()):
+            edge_key = self._edge_key(nodes[u], nodes[v])
+            if edge_key is not None:
+                edges[edge_key] = style
+        self._apply_highlight(edges, set())
+        if dynamic:
+            self.dynamic_mst = DynamicMST(self.model, tree, listener=self.update_mst_highlight)
+
+    def update_mst_highlight(self, added: list, removed: list):
+        """Выделяет рёбра, вошедшие в остовное дерево, и снимает выделение с вышедших."""
+        for start, end in removed:
+            edge_key = self._edge_key(start, end)
+            if self.highlighted_edges.pop(edge_key, None) is not None:
+                self._set_edge_style(edge_key, self.edge_color, self.edge_thickness)
+        style = (QColor(self.mst_edge_color), self.edge_thickness)
+        for start, end in added:
+            edge_key = self._edge_key(start, end)
+            if edge_key is not None:
+                self.highlighted_edges[edge_key] = style
+                self._set_edge_style(edge_key, *style)
 
     def highlight_shortest_paths(self, distances, paths):
         """Выделяет кратчайшие пути на графе."""
-        self.clear_highlighted_paths()
-
+        self._stop_dynamic_mst()
+        style = (QColor(self.shortest_path_color), self.edge_thickness * 2)
+        edges = {}
+        nodes = set()
         for path in paths:
-            for i in range(len(path) - 1):
-                start = path[i]
-                end = path[i + 1]
-
-                edge = self.edges.get((start, end)) or self.edges.get((end, start))
-
-                if edge:
-                    edge.setPen(QPen(self.shortest_path_color, self.edge_thickness * 2))
-
-                start_node, _ = self.nodes.get(start, (None, None))
-                end_node, _ = self.nodes.get(end, (None, None))
-
-                if start_node:
-                    start_node.setBrush(QBrush(Qt.yellow))
-                if end_node:
-                    end_node.setBrush(QBrush(Qt.yellow))
+            for start, end in zip(path, path[1:]):
+                edge_key = self._edge_key(start, end)
+                if edge_key is not None:
+                    edges[edge_key] = style
+                nodes.update(node_id for node_id in (start, end) if node_id in self.nodes)
 
-        self.repaint()
+        self._apply_highlight(edges, nodes)
 
     def clear_highlighted_paths(self):
-        """Сбрасывает выделение рёбер и узлов."""
-        for edge in self.edges.values():
-            edge.setPen(QPen(self.edge_color, self.edge_thickness))
+        """Сбрасывает выделение рёбер и узлов и прекращает отслеживание остовного дерева."""
+        self._stop_dynamic_mst()
+        self._apply_highlight({}, set())
 
-        for node_id, (ellipse, _) in self.nodes.items():
-            ellipse.setBrush(QBrush(self.node_color))
+    def _stop_dynamic_mst(self):
+        """Отписывает отслеживаемое остовное дерево от изменений модели."""
+        if self.dynamic_mst is not None:
+            self.dynamic_mst.close()
+            self.dynamic_mst = None
 
-        self.repaint()
+    def _apply_highlight(self, edges: dict, nodes: set):
+        """
+        Приводит выделение к заданному: edges — ключ ребра -> (цвет, толщина),
+        nodes — выделяемые узлы. Перекрашиваются только элементы, состояние
+        которых меняется; сцена сама сводит их обновления в одну отложенную
+        перерисовку.
+        """
+        for edge_key in self.highlighted_edges.keys() - edges.keys():
+            self._set_edge_style(edge_key, self.edge_color, self.edge_thickness)
+        for edge_key, style in edges.items():
+            if self.highlighted_edges.get(edge_key) != style:
+                self._set_edge_style(edge_key, *style)
+        self.highlighted_edges = edges
+
+        for node_id in self.highlighted_nodes - nodes:
+            self.nodes[node_id].setBrush(QBrush(QColor(self.graph.nodes[node_id]['color'])))
+        for node_id in nodes - self.highlighted_nodes:
+            self.nodes[node_id].setBrush(QBrush(Qt.yellow))
+        self.highlighted_nodes = nodes
+
+    def open_lazy(self, data):
+        """
+        Открывает граф из BinaryGraph в режиме просмотра: элементы сцены
+        создаются только для видимой области, граф NetworkX не строится.
+        """
+        self.clear_graph()
+        self.lazy_view = LazyGraphView(self, data)
+        self.lazy_view.refresh()
+
+    def materialize(self):
+        """Загружает целиком граф, открытый в режиме просмотра; нужно перед правкой и алгоритмами."""
+        if self.lazy_view is not None:
+            load_graph_binary(self, self.lazy_view.data)
+
+    def _viewport_changed(self):
+        """Планирует обновление элементов, зависящих от видимой области и масштаба."""
+        if self.lazy_view is not None:
+            self.lazy_view.schedule_refresh()
+        self.schedule_detail_update()
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        self._viewport_changed()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._viewport_changed()
+
+    def wheelEvent(self, event):
+        """Масштабирует холст колёсиком мыши относительно курсора."""
+        factor = self.scale_factor if event.angleDelta().y() > 0 else 1 / self.scale_factor
+        self.scale(factor, factor)
+        self._viewport_changed()
+
+    def schedule_detail_update(self, edges_changed: bool = False):
+        """
+        Планирует пересчёт уровня детализации.
+        edges_changed помечает общий контур рёбер устаревшим.
+        """
+        if edges_changed:
+            self.edge_path_dirty = True
+        if not self.detail_timer.isActive():
+            self.detail_timer.start()
+
+    def update_level_of_detail(self):
+        """
+        Показывает или скрывает подписи и отдельные линии рёбер в зависимости от масштаба,
+        создаёт подписи узлов и весов в видимой области и удаляет лишние подписи вне её.
+        """
+        zoom = self.transform().m11()
+        labels_visible = zoom >= self.LABEL_ZOOM_THRESHOLD
+        edges_batched = zoom < self.EDGE_BATCH_ZOOM_THRESHOLD
+
+        self.setUpdatesEnabled(False)
+        try:
+            if labels_visible != self.labels_visible:
+                self.labels_visible = labels_visible
+                for text in self.node_labels.values():
+                    text.setVisible(labels_visible)
+                for label in self.edge_labels.values():
+                    label.setVisible(labels_visible)
+                if self.lazy_view is not None:
+                    self.lazy_view.schedule_refresh()
+
+            if edges_batched != self.edges_batched:
+                self.edges_batched = edges_batched
+                for edge in self.edges.values():
+                    if edge is not None:
+                        edge.setVisible(not edges_batched)
+            # Пакетный элемент и так рисует все рёбра разом, общий контур ему не нужен.
+            self.edge_path.setVisible(self.edges_batched and self.edge_batch is None)
+
+            if self.edge_path.isVisible() and self.edge_path_dirty:
+                self._rebuild_edge_path()
+
+            node_ids, edge_keys = set(), set()
+            if self.labels_visible:
+                rect = self.mapToScene(self.viewport().rect()).boundingRect()
+                for item in self.scene.items(rect):
+                    if isinstance(item, NodeItem):
+                        node_ids.add(item.data(0))
+                    elif item.data(1) is not None:
+                        edge_keys.add((item.data(0), item.data(1)))
+                if self.edge_batch is not None:
+                    edge_keys.update(self.edge_batch.keys_in_rect(rect))
+                for node_id in node_ids:
+                    if node_id in self.nodes and node_id not in self.node_labels:
+                        self._create_node_label(node_id)
+                for edge_key in edge_keys:
+                    if edge_key in self.edges and edge_key not in self.edge_labels:
+                        self._create_edge_label(edge_key)
+            self._release_labels(self.node_labels, node_ids)
+            self._release_labels(self.edge_labels, edge_keys)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _release_labels(self, labels: dict, visible: set):
+        """
+        Удаляет подписи вне видимой области (первыми — созданные раньше),
+        пока их больше MAX_LABELS.
+        """
+        excess = len(labels) - self.MAX_LABELS
+        if excess <= 0:
+            return
+        hidden = [key for key in labels if key not in visible]
+        for key in hidden[:excess]:
+            self.scene.removeItem(labels.pop(key))
+
+    def _rebuild_edge_path(self):
+        """Собирает все рёбра (отрезки между центрами узлов) в один контур."""
+        centers = {}
+        for node_id, node in self.nodes.items():
+            center = node.scenePos() + node.rect().center()
+            centers[node_id] = (center.x(), center.y())
+
+        path = QPainterPath()
+        for start, end in self.edges:
+            if start != end:
+                path.moveTo(*centers[start])
+                path.lineTo(*centers[end])
+        self.edge_path.setPath(path)
+        self.edge_path_dirty = False
 
     def clear_graph(self):
         """Очищает весь граф и связанные элементы с холста."""
+        if self.lazy_view is not None:
+            self.lazy_view.clear()
+            self.lazy_view = None
+
+        self.model.clear_graph()
+
+    def _clear_items(self):
         for edge in list(self.edges.values()):
-            self.scene.removeItem(edge)
+            if edge is not None:
+                self.scene.removeItem(edge)
+        if self.edge_batch is not None:
+            self.edge_batch.clear()
 
         for label in self.edge_labels.values():
             self.scene.removeItem(label)
 
-        for node, (ellipse, _) in self.nodes.items():
+        for ellipse in self.nodes.values():
             self.scene.removeItem(ellipse)
 
-        self.graph.clear()
         self.nodes.clear()
+        self.node_labels.clear()
         self.edges.clear()
         self.edge_labels.clear()
+        self.edge_path.setPath(QPainterPath())
+        self.edge_path_dirty = False
+        self.incident_edges.clear()
+        self._stop_dynamic_mst()
+        self.highlighted_edges = {}
+        self.highlighted_nodes = set()
+        self.dirty_nodes.clear()
+        self.moved_nodes.clear()
+        self.unplaced_nodes.clear()
 
         self.scene.update()
@@ -1,16 +1,19 @@
 #ui/dialog_handler.py
-import time
 from PyQt5.QtWidgets import (
-    QInputDialog, QMessageBox, QAction, QDialog
+    QInputDialog, QMessageBox, QAction, QDialog, QProgressDialog
 )
+from PyQt5.QtCore import Qt, QThread
 import networkx as nx
 from core import (
-    dijkstra, prim_mst, kamada_kawai_layout,
-    serialize_graph, deserialize_graph,
-    force_directed_layout, spring_layout
+    dijkstra, minimum_spanning_tree, kamada_kawai_layout, csr_snapshot,
+    serialize_graph, load_graph_stream,
+    BINARY_EXTENSION, BinaryGraph, save_graph_binary, load_graph_binary,
+    force_directed_layout, spring_layout,
+    iter_force_directed_layout, iter_spring_layout
 )
-from utils.file_operations import save_to_file, load_from_file
+from utils.file_operations import choose_load_path, choose_save_path
 from .dialogs import NodeDialog, EdgeDialog, MatrixDialog
+from .layout_worker import LayoutWorker
 
 
 class DialogHandler:
@@ -18,9 +21,18 @@ class DialogHandler:
     Класс для обработки диалогов и взаимодействия с пользователем.
     """
 
+    FORCE_DIRECTED_SCALE = 25
+    KAMADA_KAWAI_SCALE = 100
+    LAZY_LOAD_NODES = 100000
+
     def __init__(self, canvas, parent):
         self.canvas = canvas
         self.parent = parent
+        self.layout_thread = None
+        self.layout_worker = None
+        self.animate_layouts = True
+        self.warm_start_layouts = False
+        self.snapshot_every = 5
 
     def create_action(self, name, callback):
         """
@@ -32,6 +44,7 @@ class DialogHandler:
 
     def add_node(self):
         """Добавляет новый узел в граф."""
+        self.canvas.materialize()
         dialog = NodeDialog(self.parent)
         if dialog.exec_() == QDialog.Accepted:
             node_data = dialog.get_data()
@@ -42,6 +55,7 @@ class DialogHandler:
 
     def remove_node(self):
         """Удаляет узел из графа."""
+        self.canvas.materialize()
         node_id, ok = QInputDialog.getText(self.parent, "Удаление узла", "Введите ID узла для удаления:")
         if ok:
             try:
@@ -51,6 +65,7 @@ class DialogHandler:
 
     def add_edge(self):
         """Добавляет новое ребро между узлами."""
+        self.canvas.materialize()
         node_ids = list(self.canvas.nodes.keys())
         if not node_ids:
             QMessageBox.warning(self.parent, "Ошибка", "Сначала добавьте хотя бы два узла.")
@@ -66,6 +81,7 @@ class DialogHandler:
 
     def remove_edge(self):
         """Удаляет ребро из графа."""
+        self.canvas.materialize()
         start, ok1 = QInputDialog.getText(self.parent, "Удаление ребра", "Введите ID начального узла:")
         if ok1:
             end, ok2 = QInputDialog.getText(self.parent, "Удаление ребра", "Введите ID конечного узла:")
@@ -92,20 +108,21 @@ class DialogHandler:
                 matrix = dialog.matrix
 
                 self.canvas.clear_graph()
-                for i in range(node_count):
-                    self.canvas.create_node(str(i + 1), f"{i + 1}", "#ADD8E6")
+                node_ids = [str(i + 1) for i in range(node_count)]
+                self.canvas.add_nodes(node_ids, labels=node_ids, colors=["#ADD8E6"] * node_count)
 
+                starts, ends, weights = [], [], []
                 for i in range(node_count):
                     for j in range(i + 1, node_count):
                         if matrix[i][j] != 0:
-                            if self.canvas.graph.has_edge(str(i + 1), str(j + 1)):
-                                QMessageBox.warning(self.parent, "Ошибка", f"Ребро между {i + 1} и {j + 1} уже существует.")
-                            else:
-                                try:
-                                    weight = int(matrix[i][j])
-                                    self.canvas.create_edge(str(i + 1), str(j + 1), weight)
-                                except ValueError as e:
-                                    QMessageBox.warning(self.parent, "Ошибка", f"Некорректное значение ребра ({i + 1}, {j + 1}): {e}")
+                            try:
+                                weights.append(int(matrix[i][j]))
+                            except ValueError as e:
+                                QMessageBox.warning(self.parent, "Ошибка", f"Некорректное значение ребра ({i + 1}, {j + 1}): {e}")
+                                continue
+                            starts.append(node_ids[i])
+                            ends.append(node_ids[j])
+                self.canvas.add_edges(starts, ends, weights)
 
                 QMessageBox.information(self.parent, "Матрица весов", "Граф успешно создан.")
         except Exception as e:
@@ -113,24 +130,48 @@ class DialogHandler:
 
     def sync_all_node_positions(self):
         """Синхронизирует позиции всех узлов в графе."""
-        for node_id, (node_item, _) in self.canvas.nodes.items():
-            self.canvas.update_node_position(node_id)
+        self.canvas.sync_all_node_positions()
 
     def save_graph(self):
         """Сохраняет граф в файл."""
+        self.canvas.materialize()
         self.sync_all_node_positions()
-        graph_data = serialize_graph(self.canvas)
-        save_to_file(self.parent, graph_data)
+        file_path = choose_save_path(self.parent)
+        if not file_path:
+            return
+
+        try:
+            if file_path.endswith(BINARY_EXTENSION):
+                save_graph_binary(self.canvas, file_path)
+            else:
+                with open(file_path, "w") as file:
+                    file.write(serialize_graph(self.canvas))
+            QMessageBox.information(self.parent, "Сохранение", "Граф успешно сохранён.")
+        except Exception as e:
+            QMessageBox.critical(self.parent, "Ошибка", f"Не удалось сохранить файл: {e}")
 
     def load_graph(self):
         """Загружает граф из файла."""
         self.delete_graph()
-        graph_data = load_from_file(self.parent)
-        if not graph_data:
+        file_path = choose_load_path(self.parent)
+        if not file_path:
             return
 
         try:
-            deserialize_graph(self.canvas, graph_data)
+            if file_path.endswith(BINARY_EXTENSION):
+                data = BinaryGraph(file_path)
+                if data.node_count >= self.LAZY_LOAD_NODES:
+                    self.canvas.open_lazy(data)
+                    QMessageBox.information(
+                        self.parent, "Загрузка",
+                        "Граф открыт для просмотра: на холсте создаются только видимые узлы. "
+                        "Правка и алгоритмы загрузят граф целиком."
+                    )
+                    return
+                load_graph_binary(self.canvas, data)
+            else:
+                with open(file_path, "r") as file:
+                    load_graph_stream(self.canvas, file)
             self.canvas.update()
             QMessageBox.information(self.parent, "Загрузка", "Граф успешно загружен.")
         except Exception as e:
@@ -143,12 +184,13 @@ class DialogHandler:
 
     def run_dijkstra(self):
         """Запускает алгоритм Дейкстры."""
+        self.canvas.materialize()
         start_node, ok = QInputDialog.getText(self.parent, "Алгоритм Дейкстры", "Введите начальный узел:")
         if ok and start_node in self.canvas.nodes:
             end_node, ok = QInputDialog.getText(self.parent, "Алгоритм Дейкстры", "Введите конечный узел:")
 
             if ok and end_node in self.canvas.nodes:
-                distance, path = dijkstra(self.canvas, start_node, end_node)
+                distance, path = dijkstra(self.canvas.model, start_node, end_node)
                 print(f"Distance: {distance}")
                 print(f"Path: {path}")
                 self.canvas.highlight_shortest_paths(distance, path)
@@ -156,102 +198,162 @@ class DialogHandler:
                 QMessageBox.warning(self.parent, "Ошибка", "Конечный узел не существует или не был введён.")
 
     def run_prim(self):
-        """Запускает алгоритм Прима для нахождения минимального остовного дерева."""
-        mst_edges = prim_mst(self.canvas)
-        self.canvas.highlight_mst(mst_edges)
+        """
+        Запускает поиск минимального остовного дерева.
+        Выделение остаётся актуальным при последующем добавлении и удалении рёбер.
+        """
+        self.canvas.materialize()
+        tree = minimum_spanning_tree(self.canvas.model)
+        self.canvas.highlight_mst(tree, dynamic=True)
 
-    def run_kamada_kawai(self):
-        """Запускает алгоритм Камада-Кавай для расположения узлов."""
-        try:
-            if not self.canvas.graph or not nx.is_connected(self.canvas.graph):
-                QMessageBox.warning(self.parent, "Ошибка", "Граф должен быть связным для выполнения алгоритма Камада-Кавай.")
-                return
+    @staticmethod
+    def scale_layout(layout: dict, factor: float, dx: float = 0.0, dy: float = 0.0) -> dict:
+        """
+        Переводит расположение в координаты холста: x * factor + dx, y * factor + dy.
+        Масштаб постоянный, поэтому преобразование обратимо и текущие позиции
+        можно передать обратно в алгоритм для тёплого старта.
+        """
+        return {
+            node_id: (x * factor + dx, y * factor + dy)
+            for node_id, (x, y) in layout.items()
+        }
 
-            self.canvas.graph.clear()
-            for node_id in self.canvas.nodes:
-                self.canvas.graph.add_node(node_id)
-            for (start, end), edge in self.canvas.edges.items():
-                self.canvas.graph.add_edge(start, end)
+    def initial_positions(self, factor: float, dx: float = 0.0, dy: float = 0.0):
+        """
+        Текущие позиции размещённых узлов в координатах алгоритма для тёплого старта
+        или None, если тёплый старт выключен.
+        """
+        if not self.warm_start_layouts:
+            return None
+        return self.scale_layout(self.canvas.placed_positions(), 1 / factor, -dx / factor, -dy / factor)
 
-            start_time = time.time()
-            layout = kamada_kawai_layout(self.canvas.graph)
-            if not layout:
-                QMessageBox.warning(self.parent, "Ошибка", "Алгоритм Камада-Кавай не вернул расположение для узлов.")
-                return
+    def set_warm_start_layouts(self, enabled: bool):
+        """Включает или выключает тёплый старт расположений с текущих позиций."""
+        self.warm_start_layouts = enabled
 
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            max_x = max(x for x, _ in layout.values())
-            max_y = max(y for _, y in layout.values())
+    def set_animate_layouts(self, enabled: bool):
+        """Включает или выключает показ промежуточных расположений."""
+        self.animate_layouts = enabled
 
-            for node_id, (x, y) in layout.items():
-                scaled_x = (x / max_x) * 100
-                scaled_y = (y / max_y) * 100
-                self.canvas.update_node_position(node_id)
+    def set_batched_edges(self, enabled: bool):
+        """Включает или выключает отрисовку всех рёбер одним элементом сцены."""
+        self.canvas.set_batched_edges(enabled)
 
-                node_item = self.canvas.nodes[node_id][0]
-                node_item.setPos(scaled_x, scaled_y)
+    def start_layout(self, title: str, error_prefix: str, compute, iterations: int = 0, stream: bool = False):
+        """
+        Запускает расчёт расположения в отдельном потоке с индикатором хода и кнопкой отмены.
+        Позиции переносятся на холст целиком после успешного завершения.
+        В потоковом режиме холст обновляется по ходу расчёта, а кнопка
+        останавливает расчёт, оставляя текущее расположение.
+        """
+        if self.layout_thread is not None:
+            QMessageBox.warning(self.parent, "Ошибка", "Расчёт расположения уже выполняется.")
+            return
 
-            self.canvas.scene.update()
-            QMessageBox.information(self.parent, "Камада-Кавай", f"Расположение узлов выполнено за {elapsed_time:.4f} секунд.")
-        except Exception as e:
-            QMessageBox.critical(self.parent, "Ошибка", f"Ошибка алгоритма Камада-Кавай: {e}")
+        if not self.canvas.graph or not nx.is_connected(self.canvas.graph):
+            QMessageBox.warning(self.parent, "Ошибка", f"Граф должен быть связным для выполнения: {title}.")
+            return
 
-    def run_force_directed(self):
-        """Запускает силовой метод для расположения узлов."""
-        try:
-            if not self.canvas.graph or not nx.is_connected(self.canvas.graph):
-                QMessageBox.warning(self.parent, "Ошибка", "Граф должен быть связным для выполнения силового метода.")
+        cancel_text = "Остановить" if stream else "Отмена"
+        progress = QProgressDialog(f"{title}: расчёт расположения...", cancel_text, 0, iterations, self.parent)
+        progress.setWindowTitle(title)
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+
+        thread = QThread(self.parent)
+        # Неизменяемый CSR-снимок модели: безопасен для другого потока и
+        # строится заново, только если узлы или рёбра менялись после прошлого
+        # алгоритма (перемещения узлов снимок не сбрасывают).
+        worker = LayoutWorker(compute, csr_snapshot(self.canvas.model), stream=stream)
+        worker.moveToThread(thread)
+
+        def finish():
+            progress.close()
+            thread.quit()
+            self.layout_thread = None
+            self.layout_worker = None
+
+        def on_finished(layout, used, elapsed_time):
+            finish()
+            if not layout:
+                QMessageBox.warning(self.parent, "Ошибка", f"{title}: не получено расположение для узлов.")
                 return
+            self.canvas.apply_layout(layout)
+            message = f"Расположение узлов выполнено за {elapsed_time:.4f} секунд"
+            message += f" ({used} итераций)." if used is not None else "."
+            QMessageBox.information(self.parent, title, message)
+
+        def on_snapshot(layout, iteration):
+            if self.layout_worker is worker:
+                self.canvas.apply_layout(layout)
+                progress.setValue(iteration)
+                worker.snapshot_applied()
+
+        def on_failed(error):
+            finish()
+            QMessageBox.critical(self.parent, "Ошибка", f"{error_prefix}: {error}")
+
+        thread.started.connect(worker.run)
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        worker.progress.connect(lambda iteration, total: progress.setValue(iteration))
+        worker.snapshot.connect(on_snapshot)
+        worker.finished.connect(on_finished)
+        worker.failed.connect(on_failed)
+        worker.cancelled.connect(finish)
+        # Рабочий поток занят расчётом, поэтому флаг отмены ставится сразу из потока интерфейса.
+        progress.canceled.connect(worker.cancel, Qt.DirectConnection)
+
+        self.layout_thread = thread
+        self.layout_worker = worker
+        thread.start()
+
+    def run_kamada_kawai(self):
+        """Запускает алгоритм Камада-Кавай для расположения узлов."""
+        self.canvas.materialize()
+        scale = self.KAMADA_KAWAI_SCALE
+        initial_pos = self.initial_positions(scale)
 
-            self.canvas.graph.clear()
-            for node_id in self.canvas.nodes:
-                self.canvas.graph.add_node(node_id)
-            for (start, end), edge in self.canvas.edges.items():
-                self.canvas.graph.add_edge(start, end)
+        def compute(graph, callback):
+            return self.scale_layout(kamada_kawai_layout(graph, initial_pos=initial_pos), scale), None
 
-            start_time = time.time()
-            layout = force_directed_layout(self.canvas.graph)
-            if not layout:
-                QMessageBox.warning(self.parent, "Ошибка", "Силовой метод не вернул расположение для узлов.")
-                return
+        self.start_layout("Камада-Кавай", "Ошибка алгоритма Камада-Кавай", compute)
 
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            max_x = max(x for x, _ in layout.values())
-            max_y = max(y for _, y in layout.values())
+    def run_force_directed(self):
+        """Запускает силовой метод для расположения узлов."""
+        self.canvas.materialize()
+        every = self.snapshot_every
+        scale = self.FORCE_DIRECTED_SCALE
+        initial_pos = self.initial_positions(scale)
 
-            for node_id, (x, y) in layout.items():
-                scaled_x = (x / max_x) * 100
-                scaled_y = (y / max_y) * 100
-                self.canvas.update_node_position(node_id)
+        def compute(graph, callback):
+            layout, iterations = force_directed_layout(graph, callback=callback, initial_pos=initial_pos)
+            return self.scale_layout(layout, scale), iterations
 
-                node_item = self.canvas.nodes[node_id][0]
-                node_item.setPos(scaled_x, scaled_y)
+        def compute_stream(graph):
+            for layout, iteration in iter_force_directed_layout(graph, every=every, initial_pos=initial_pos):
+                yield self.scale_layout(layout, scale), iteration
 
-            self.canvas.scene.update()
-            QMessageBox.information(self.parent, "Силовой метод", f"Расположение узлов выполнено за {elapsed_time:.4f} секунд.")
-        except Exception as e:
-            QMessageBox.critical(self.parent, "Ошибка", f"Ошибка силового метода: {e}")
+        self.start_layout("Силовой метод", "Ошибка силового метода",
+                          compute_stream if self.animate_layouts else compute,
+                          iterations=50, stream=self.animate_layouts)
 
     def run_spring_layout(self):
         """Запускает пружинный алгоритм для расположения узлов."""
-        try:
-            if not self.canvas.graph or not nx.is_connected(self.canvas.graph):
-                QMessageBox.warning(self.parent, "Ошибка", "Граф должен быть связным для выполнения пружинного алгоритма.")
-                return
-
-            self.canvas.graph.clear()
-            for node_id in self.canvas.nodes:
-                self.canvas.graph.add_node(node_id)
-            for (start, end), edge in self.canvas.edges.items():
-                self.canvas.graph.add_edge(start, end)
-
-            start_time = time.time()
-            spring_layout(self.canvas.graph, self.canvas)
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            self.canvas.scene.update()
-            QMessageBox.information(self.parent, "Пружинный алгоритм", f"Расположение узлов выполнено за {elapsed_time:.4f} секунд.")
-        except Exception as e:
-            QMessageBox.critical(self.parent, "Ошибка", f"Ошибка пружинного алгоритма: {e}")
+        self.canvas.materialize()
+        rect = self.canvas.scene.sceneRect()
+        width, height, left, top = rect.width(), rect.height(), rect.x(), rect.y()
+        every = self.snapshot_every
+        initial_pos = self.initial_positions(1, left, top)
+
+        def compute(graph, callback):
+            layout, iterations = spring_layout(graph, width, height, callback=callback, initial_pos=initial_pos)
+            return self.scale_layout(layout, 1, left, top), iterations
+
+        def compute_stream(graph):
+            for layout, iteration in iter_spring_layout(graph, width, height, every=every, initial_pos=initial_pos):
+                yield self.scale_layout(layout, 1, left, top), iteration
+
+        self.start_layout("Пружинный алгоритм", "Ошибка пружинного алгоритма",
+                          compute_stream if self.animate_layouts else compute,
+                          iterations=200, stream=self.animate_layouts)
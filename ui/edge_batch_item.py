@@ -0,0 +1,203 @@
+# ui/edge_batch_item.py
+import numpy as np
+from PyQt5.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+from PyQt5.QtGui import QPen, QColor, QPolygonF
+from PyQt5.QtCore import QRectF
+
+
+def _polygon(points: np.ndarray) -> QPolygonF:
+    """QPolygonF из массива N × 2, заполненный напрямую через буфер NumPy."""
+    polygon = QPolygonF(len(points))
+    if len(points):
+        buffer = polygon.data()
+        buffer.setsize(points.size * 8)
+        np.frombuffer(buffer, dtype=np.float64)[:] = points.ravel()
+    return polygon
+
+
+class EdgeBatchItem(QGraphicsItem):
+    """
+    Все рёбра-отрезки графа в одном элементе сцены.
+
+    Концы отрезков хранятся в массиве lines (строка x1, y1, x2, y2 на ребро),
+    оформление — в массивах colors (ARGB) и widths. Ребро адресуется ключом
+    (start, end); при удалении на его место переносится последняя строка.
+    Перемещение и выделение рёбер меняют только их строки массивов и
+    перерисовывают только область этих рёбер. При отрисовке рёбра вне перерисовываемой
+    области отбрасываются, а остальные рисуются одним вызовом drawLines на
+    каждое сочетание цвета и толщины.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        super().__init__()
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.lines = np.zeros((capacity, 4), dtype=np.float64)
+        self.colors = np.zeros(capacity, dtype=np.uint32)
+        self.widths = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+        self.keys = []
+        self.rows = {}
+        self._bounds = QRectF()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, key) -> bool:
+        return key in self.rows
+
+    def _reserve(self, count: int) -> None:
+        capacity = len(self.lines)
+        if count <= capacity:
+            return
+        capacity = max(count, 2 * capacity)
+        for name in ("lines", "colors", "widths"):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+
+    @staticmethod
+    def _line_rect(line, width: float) -> QRectF:
+        x1, y1, x2, y2 = line
+        margin = width / 2 + 1
+        return QRectF(min(x1, x2) - margin, min(y1, y2) - margin,
+                      abs(x2 - x1) + 2 * margin, abs(y2 - y1) + 2 * margin)
+
+    def _include(self, rect: QRectF) -> None:
+        """Расширяет границы элемента, если rect в них не помещается."""
+        if not self._bounds.contains(rect):
+            self.prepareGeometryChange()
+            self._bounds = self._bounds.united(rect) if not self._bounds.isNull() else rect
+
+    def _rows_rect(self, rows: np.ndarray) -> QRectF:
+        """Прямоугольник, охватывающий рёбра с данными номерами строк."""
+        lines = self.lines[rows]
+        margin = self.widths[rows].max() / 2 + 1
+        left = min(lines[:, 0].min(), lines[:, 2].min()) - margin
+        top = min(lines[:, 1].min(), lines[:, 3].min()) - margin
+        right = max(lines[:, 0].max(), lines[:, 2].max()) + margin
+        bottom = max(lines[:, 1].max(), lines[:, 3].max()) + margin
+        return QRectF(left, top, right - left, bottom - top)
+
+    def _refresh_bounds(self) -> None:
+        """Пересчитывает границы по всем рёбрам сразу."""
+        self.prepareGeometryChange()
+        self._bounds = self._rows_rect(np.arange(self.count)) if self.count else QRectF()
+
+    def add(self, key, line, color, width: float) -> None:
+        """Добавляет ребро с концами line = (x1, y1, x2, y2)."""
+        self.extend([key], [line], [QColor(color).rgba()], [width])
+
+    def extend(self, keys: list, lines, colors, widths) -> None:
+        """
+        Добавляет рёбра пакетом. lines — массив E × 4, colors — значения ARGB
+        (QColor.rgba()), widths — толщины линий.
+        """
+        if not keys:
+            return
+        start = self.count
+        end = start + len(keys)
+        self._reserve(end)
+        self.lines[start:end] = lines
+        self.colors[start:end] = colors
+        self.widths[start:end] = widths
+        for row, key in enumerate(keys, start):
+            self.rows[key] = row
+        self.keys.extend(keys)
+        self.count = end
+        if len(keys) == 1:
+            self._include(self._line_rect(self.lines[start].tolist(), self.widths[start]))
+        else:
+            self._refresh_bounds()
+        self.update()
+
+    def remove(self, key) -> None:
+        """Удаляет ребро; на его место переносится последняя строка массивов."""
+        row = self.rows.pop(key)
+        rect = self._line_rect(self.lines[row].tolist(), self.widths[row])
+        last = self.count - 1
+        if row != last:
+            moved = self.keys[last]
+            self.keys[row] = moved
+            self.rows[moved] = row
+            self.lines[row] = self.lines[last]
+            self.colors[row] = self.colors[last]
+            self.widths[row] = self.widths[last]
+        self.keys.pop()
+        self.count = last
+        self.update(rect)
+
+    def clear(self) -> None:
+        self.count = 0
+        self.keys.clear()
+        self.rows.clear()
+        self._refresh_bounds()
+        self.update()
+
+    def line(self, key) -> tuple:
+        """Концы ребра (x1, y1, x2, y2)."""
+        return tuple(self.lines[self.rows[key]].tolist())
+
+    def style(self, key) -> tuple:
+        """Цвет (QColor) и толщина линии ребра."""
+        row = self.rows[key]
+        return QColor.fromRgba(int(self.colors[row])), float(self.widths[row])
+
+    def set_lines(self, keys: list, lines) -> None:
+        """
+        Переносит рёбра пакетом: lines — массив len(keys) × 4. Перерисовывается
+        только прямоугольник, охватывающий старые и новые положения этих рёбер.
+        """
+        if not keys:
+            return
+        rows = np.fromiter((self.rows[key] for key in keys), dtype=np.intp, count=len(keys))
+        old = self._rows_rect(rows)
+        self.lines[rows] = lines
+        new = self._rows_rect(rows)
+        self._include(new)
+        self.update(old.united(new))
+
+    def set_style(self, key, color, width: float) -> None:
+        """Меняет цвет и толщину линии ребра."""
+        row = self.rows[key]
+        self.colors[row] = QColor(color).rgba()
+        self.widths[row] = width
+        rect = self._line_rect(self.lines[row].tolist(), width)
+        self._include(rect)
+        self.update(rect)
+
+    def keys_in_rect(self, rect: QRectF) -> list:
+        """Ключи рёбер, ограничивающий прямоугольник которых пересекает rect."""
+        rows = np.flatnonzero(self._visible(rect))
+        return [self.keys[row] for row in rows.tolist()]
+
+    def _visible(self, rect: QRectF) -> np.ndarray:
+        lines = self.lines[:self.count]
+        margin = self.widths[:self.count] / 2 + 1
+        return ((np.minimum(lines[:, 0], lines[:, 2]) - margin <= rect.right())
+                & (np.maximum(lines[:, 0], lines[:, 2]) + margin >= rect.left())
+                & (np.minimum(lines[:, 1], lines[:, 3]) - margin <= rect.bottom())
+                & (np.maximum(lines[:, 1], lines[:, 3]) + margin >= rect.top()))
+
+    def boundingRect(self) -> QRectF:
+        return self._bounds
+
+    def paint(self, painter, option: QStyleOptionGraphicsItem, widget=None) -> None:
+        if not self.count:
+            return
+        rows = np.flatnonzero(self._visible(option.exposedRect))
+        if not len(rows):
+            return
+
+        # Группы рёбер одного оформления; самая многочисленная (обычные рёбра)
+        # рисуется первой, выделенные — поверх неё.
+        styles = (self.colors[rows].astype(np.uint64) << np.uint64(32)) | self.widths[rows].astype(np.float32).view(np.uint32)
+        unique, inverse, counts = np.unique(styles, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        for group in np.argsort(-counts, kind="stable").tolist():
+            group_rows = rows[order[bounds[group]:bounds[group + 1]]]
+            color = QColor.fromRgba(int(unique[group] >> np.uint64(32)))
+            width = float(self.widths[group_rows[0]])
+            painter.setPen(QPen(color, width))
+            painter.drawLines(_polygon(self.lines[group_rows].reshape(-1, 2)))
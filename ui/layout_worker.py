@@ -0,0 +1,86 @@
+# ui/layout_worker.py
+import threading
+import time
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class LayoutWorker(QObject):
+    """
+    Выполняет расчёт расположения узлов в отдельном потоке.
+
+    compute(graph, callback) должна вернуть пару (расположение, число итераций)
+    и вызывать callback(итерация, всего) по ходу расчёта. В потоковом режиме
+    (stream=True) compute(graph) возвращает генератор пар
+    (расположение, номер итерации), и промежуточные расположения
+    передаются сигналом snapshot не чаще snapshot_interval секунд и только
+    после того, как холст применил предыдущее (snapshot_applied); снимки,
+    полученные в это время, пропускаются.
+
+    cancel и snapshot_applied вызываются из потока интерфейса напрямую:
+    сам рабочий поток занят расчётом и не обрабатывает поставленные
+    в очередь вызовы, поэтому оба флага — threading.Event.
+    """
+
+    progress = pyqtSignal(int, int)
+    snapshot = pyqtSignal(object, int)
+    finished = pyqtSignal(object, object, float)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, compute, graph, stream: bool = False, snapshot_interval: float = 1 / 30):
+        super().__init__()
+        self.compute = compute
+        self.graph = graph
+        self.stream = stream
+        self.snapshot_interval = snapshot_interval
+        self._cancel_requested = threading.Event()
+        self._snapshot_consumed = threading.Event()
+        self._snapshot_consumed.set()
+
+    def cancel(self):
+        """Просит прервать расчёт после текущей итерации."""
+        self._cancel_requested.set()
+
+    def snapshot_applied(self):
+        """Сообщает, что холст применил последний снимок и готов к следующему."""
+        self._snapshot_consumed.set()
+
+    def _report(self, iteration: int, total: int) -> bool:
+        """Сообщает о ходе расчёта и возвращает False, если его нужно прервать."""
+        self.progress.emit(iteration, total)
+        return not self._cancel_requested.is_set()
+
+    def _run_stream(self) -> tuple:
+        """Читает генератор расположений и пересылает снимки на холст."""
+        layout, iterations = None, 0
+        last_sent = 0.0
+        for layout, iterations in self.compute(self.graph):
+            now = time.time()
+            if self._snapshot_consumed.is_set() and now - last_sent >= self.snapshot_interval:
+                last_sent = now
+                self._snapshot_consumed.clear()
+                self.snapshot.emit(layout, iterations)
+            if self._cancel_requested.is_set():
+                break
+        return layout, iterations
+
+    def run(self):
+        """
+        Запускает расчёт; результат передаётся сигналами.
+        В потоковом режиме отмена останавливает расчёт и оставляет последнее расположение.
+        """
+        try:
+            start_time = time.time()
+            if self.stream:
+                layout, iterations = self._run_stream()
+            else:
+                layout, iterations = self.compute(self.graph, self._report)
+            elapsed_time = time.time() - start_time
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        if self._cancel_requested.is_set() and not self.stream:
+            self.cancelled.emit()
+        else:
+            self.finished.emit(layout, iterations, elapsed_time)
@@ -0,0 +1,174 @@
+# ui/lazy_view.py
+import numpy as np
+from PyQt5.QtWidgets import QGraphicsEllipseItem, QGraphicsLineItem, QGraphicsTextItem
+from PyQt5.QtGui import QBrush, QPen, QColor
+from PyQt5.QtCore import Qt, QTimer, QRectF
+
+
+class LazyGraphView:
+    """
+    Просмотр графа из двоичного файла без загрузки его целиком.
+
+    Позиции, концы рёбер и коды цветов читаются прямо из отображённых
+    в память массивов BinaryGraph. Элементы сцены создаются только для
+    узлов в видимой области и рёбер между ними (петли не рисуются)
+    и удаляются, когда узлы из неё уходят. Если видимых узлов или рёбер
+    между ними больше max_items, показывается равномерная выборка из них.
+    Рёбра видимых узлов находятся по индексу, построенному при первом
+    обновлении, без просмотра всех рёбер файла. Подписи узлов создаются,
+    только пока холст показывает подписи (Canvas.labels_visible).
+    Элементы только для просмотра: для редактирования холст загружает
+    граф целиком (Canvas.materialize).
+    """
+
+    RADIUS = 20
+
+    def __init__(self, canvas, data, max_items: int = 20000) -> None:
+        self.canvas = canvas
+        self.data = data
+        self.max_items = max_items
+        self.node_items = {}
+        self.edge_items = {}
+        self.labels_shown = canvas.labels_visible
+        self._edge_order = None
+        self._edge_starts = None
+
+        self.refresh_timer = QTimer(canvas)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(30)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        if data.node_count:
+            low = np.asarray(data.positions.min(axis=0), dtype=float)
+            high = np.asarray(data.positions.max(axis=0), dtype=float) + 2 * self.RADIUS
+            canvas.scene.setSceneRect(QRectF(low[0], low[1], high[0] - low[0], high[1] - low[1]))
+
+    def schedule_refresh(self):
+        """Планирует обновление элементов после прокрутки или изменения размера окна."""
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+
+    def visible_nodes(self) -> np.ndarray:
+        """Индексы узлов, эллипсы которых пересекают видимую область сцены."""
+        rect = self.canvas.mapToScene(self.canvas.viewport().rect()).boundingRect()
+        x = self.data.positions[:, 0]
+        y = self.data.positions[:, 1]
+        diameter = 2 * self.RADIUS
+        inside = ((x >= rect.left() - diameter) & (x <= rect.right())
+                  & (y >= rect.top() - diameter) & (y <= rect.bottom()))
+        nodes = np.flatnonzero(inside)
+        if len(nodes) > self.max_items:
+            nodes = nodes[::-(-len(nodes) // self.max_items)]
+        return nodes
+
+    def _build_edge_index(self):
+        """
+        Индекс рёбер по начальному узлу: строки _edge_starts[i]:_edge_starts[i + 1]
+        массива _edge_order — рёбра, начинающиеся в узле i. _edge_order равен
+        None, если рёбра в файле уже упорядочены по началу (так их записывает
+        save_graph_binary); тогда строки и есть номера рёбер.
+        """
+        sources = self.data.sources
+        if len(sources) > 1 and np.any(sources[1:] < sources[:-1]):
+            self._edge_order = np.argsort(sources, kind="stable")
+            sources = sources[self._edge_order]
+        self._edge_starts = np.searchsorted(sources, np.arange(self.data.node_count + 1))
+
+    def visible_edges(self, nodes: np.ndarray, shown: np.ndarray) -> np.ndarray:
+        """
+        Индексы рёбер, оба конца которых среди показанных узлов (shown — маска
+        узлов). Если таких рёбер больше max_items, берётся равномерная выборка.
+        """
+        if self._edge_starts is None:
+            self._build_edge_index()
+        starts = self._edge_starts[nodes]
+        counts = self._edge_starts[nodes + 1] - starts
+        total = int(counts.sum())
+        # Номера строк всех рёбер выбранных узлов без цикла по узлам.
+        rows = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+        edges = rows if self._edge_order is None else self._edge_order[rows]
+
+        sources, targets = self.data.sources[edges], self.data.targets[edges]
+        edges = edges[shown[targets] & (sources != targets)]
+        if len(edges) > self.max_items:
+            edges = edges[::-(-len(edges) // self.max_items)]
+        return edges
+
+    def refresh(self):
+        """Приводит набор элементов сцены в соответствие с видимой областью."""
+        nodes = self.visible_nodes()
+        shown = np.zeros(self.data.node_count, dtype=bool)
+        shown[nodes] = True
+        edges = self.visible_edges(nodes, shown)
+
+        self.canvas.setUpdatesEnabled(False)
+        try:
+            self._sync_nodes(set(nodes.tolist()))
+            self._sync_edges(edges)
+        finally:
+            self.canvas.setUpdatesEnabled(True)
+
+    def _sync_nodes(self, visible: set):
+        for index in set(self.node_items) - visible:
+            self.canvas.scene.removeItem(self.node_items.pop(index))
+
+        if self.labels_shown != self.canvas.labels_visible:
+            self.labels_shown = self.canvas.labels_visible
+            for index, ellipse in self.node_items.items():
+                if self.labels_shown:
+                    self._add_label(index, ellipse)
+                else:
+                    for text in ellipse.childItems():
+                        self.canvas.scene.removeItem(text)
+
+        diameter = 2 * self.RADIUS
+        for index in visible - set(self.node_items):
+            x, y = self.data.positions[index].tolist()
+            ellipse = QGraphicsEllipseItem(x, y, diameter, diameter)
+            ellipse.setBrush(QBrush(QColor(self.data.palette[self.data.color_codes[index]])))
+            if self.labels_shown:
+                self._add_label(index, ellipse)
+            self.canvas.scene.addItem(ellipse)
+            self.node_items[index] = ellipse
+
+    def _add_label(self, index: int, ellipse: QGraphicsEllipseItem):
+        text = QGraphicsTextItem(self.data.labels[index])
+        text.setParentItem(ellipse)
+        text.setDefaultTextColor(Qt.black)
+        text.setPos(
+            ellipse.rect().center().x() - text.boundingRect().width() / 2,
+            ellipse.rect().center().y() - text.boundingRect().height() / 2
+        )
+
+    def _sync_edges(self, edges: np.ndarray):
+        visible = set(edges.tolist())
+        for index in set(self.edge_items) - visible:
+            self.canvas.scene.removeItem(self.edge_items.pop(index))
+
+        new = np.array(sorted(visible - set(self.edge_items)), dtype=np.intp)
+        if not len(new):
+            return
+
+        # Отрезки между границами кругов узлов, для всех новых рёбер сразу.
+        start = self.data.positions[self.data.sources[new]] + self.RADIUS
+        end = self.data.positions[self.data.targets[new]] + self.RADIUS
+        direction = end - start
+        length = np.maximum(np.hypot(direction[:, 0], direction[:, 1]), 1e-9)[:, None]
+        offset = direction / length * self.RADIUS
+        lines = np.hstack((start + offset, end - offset)).tolist()
+
+        pen = QPen(self.canvas.edge_color, self.canvas.edge_thickness)
+        for index, (x1, y1, x2, y2) in zip(new.tolist(), lines):
+            line = QGraphicsLineItem(x1, y1, x2, y2)
+            line.setPen(pen)
+            self.canvas.scene.addItem(line)
+            self.edge_items[index] = line
+
+    def clear(self):
+        """Удаляет все созданные элементы сцены."""
+        self.refresh_timer.stop()
+        for item in list(self.node_items.values()) + list(self.edge_items.values()):
+            self.canvas.scene.removeItem(item)
+        self.node_items.clear()
+        self.edge_items.clear()
+        self.canvas.scene.setSceneRect(QRectF())
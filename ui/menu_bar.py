@@ -25,6 +25,14 @@ class MenuBarCreator:
         algorithms_menu.addAction(self.dialog_handler.create_action("Расположение Камада-Кавай", self.dialog_handler.run_kamada_kawai))
         algorithms_menu.addAction(self.dialog_handler.create_action("Силовой метод", self.dialog_handler.run_force_directed))
         algorithms_menu.addAction(self.dialog_handler.create_action("Пружинный алгоритм", self.dialog_handler.run_spring_layout))
+        animate_action = self.dialog_handler.create_action("Показывать ход расположения", self.dialog_handler.set_animate_layouts)
+        animate_action.setCheckable(True)
+        animate_action.setChecked(self.dialog_handler.animate_layouts)
+        algorithms_menu.addAction(animate_action)
+        warm_start_action = self.dialog_handler.create_action("Начинать с текущего расположения", self.dialog_handler.set_warm_start_layouts)
+        warm_start_action.setCheckable(True)
+        warm_start_action.setChecked(self.dialog_handler.warm_start_layouts)
+        algorithms_menu.addAction(warm_start_action)
 
         edit_menu = menu_bar.addMenu("Правка")
         edit_menu.addAction(self.dialog_handler.create_action("Добавить узел", self.dialog_handler.add_node))
@@ -33,6 +41,12 @@ class MenuBarCreator:
         edit_menu.addAction(self.dialog_handler.create_action("Удалить ребро", self.dialog_handler.remove_edge))
         edit_menu.addAction(self.dialog_handler.create_action("Добавить граф по матрице весов", self.dialog_handler.add_graph_from_matrix))
 
+        view_menu = menu_bar.addMenu("Вид")
+        batched_edges_action = self.dialog_handler.create_action("Рисовать рёбра одним элементом", self.dialog_handler.set_batched_edges)
+        batched_edges_action.setCheckable(True)
+        batched_edges_action.setChecked(self.dialog_handler.canvas.edge_batch is not None)
+        view_menu.addAction(batched_edges_action)
+
         menu_bar.setStyleSheet("""
             QMenuBar {
                 background-color: #f0f0f0;
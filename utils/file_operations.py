@@ -1,28 +1,27 @@
 # utils/file_operations.py
-from PyQt5.QtWidgets import QFileDialog, QMessageBox
+from PyQt5.QtWidgets import QFileDialog
 
 
-def save_to_file(parent, graph_data):
-    """Сохраняет данные графа в файл."""
-    file_path, _ = QFileDialog.getSaveFileName(parent, "Сохранить граф", "", "JSON Files (*.json)")
-    if not file_path:
-        return
-    try:
-        with open(file_path, "w") as file:
-            file.write(graph_data)
-        QMessageBox.information(parent, "Сохранение", "Граф успешно сохранён.")
-    except Exception as e:
-        QMessageBox.critical(parent, "Ошибка", f"Не удалось сохранить файл: {e}")
+GRAPH_FILE_FILTERS = {
+    "JSON Files (*.json)": ".json",
+    "Binary Graph Files (*.gbin)": ".gbin",
+}
+
 
+def choose_load_path(parent):
+    """Спрашивает путь к файлу графа для загрузки; None, если выбор отменён."""
+    file_path, _ = QFileDialog.getOpenFileName(parent, "Загрузить граф", "", ";;".join(GRAPH_FILE_FILTERS))
+    return file_path or None
 
-def load_from_file(parent):
-    """Загружает данные графа из файла."""
-    file_path, _ = QFileDialog.getOpenFileName(parent, "Загрузить граф", "", "JSON Files (*.json)")
+
+def choose_save_path(parent):
+    """
+    Спрашивает путь для сохранения графа; None, если выбор отменён.
+    Если расширение не указано, добавляется расширение выбранного фильтра.
+    """
+    file_path, selected_filter = QFileDialog.getSaveFileName(parent, "Сохранить граф", "", ";;".join(GRAPH_FILE_FILTERS))
     if not file_path:
         return None
-    try:
-        with open(file_path, "r") as file:
-            return file.read()
-    except Exception as e:
-        QMessageBox.critical(parent, "Ошибка", f"Не удалось загрузить файл: {e}")
-        return None
+    if not any(file_path.endswith(extension) for extension in GRAPH_FILE_FILTERS.values()):
+        file_path += GRAPH_FILE_FILTERS.get(selected_filter, ".json")
+    return file_path